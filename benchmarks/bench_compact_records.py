@@ -0,0 +1,68 @@
+# pylint: disable=missing-docstring, invalid-name, wrong-import-position
+"""
+Memory of 100000 queued loop packets, as dicts and as CompactRecord,
+measured with tracemalloc, and the cost of making them on the engine thread
+and of turning them back into dicts on the publishing thread.
+
+The packets have the 30 fields of a typical Vantage loop packet,
+some of them None as when a sensor is missing.
+
+Run from the root of the repository with the weewx and paho packages installed:
+
+    PYTHONPATH=bin python benchmarks/bench_compact_records.py
+"""
+import random
+import time
+import tracemalloc
+
+from user.mqttpublish import CompactRecord
+
+PACKETS = 100000
+FIELDS = ['altimeter', 'barometer', 'consBatteryVoltage', 'dayET', 'dayRain', 'dewpoint',
+          'extraAlarm1', 'forecastIcon', 'heatindex', 'inDewpoint', 'inHumidity', 'inTemp',
+          'insideAlarm', 'monthET', 'monthRain', 'outHumidity', 'outTemp', 'pressure',
+          'radiation', 'rain', 'rainAlarm', 'rainRate', 'stormRain', 'sunrise', 'sunset',
+          'txBatteryStatus', 'UV', 'windchill', 'windDir', 'windSpeed']
+
+def create_packet(timestamp):
+    packet = {'dateTime': timestamp, 'usUnits': 1}
+    for field in FIELDS:
+        packet[field] = round(random.uniform(0, 100), 3)
+    packet['radiation'] = None
+    packet['UV'] = None
+    return packet
+
+def memory(make):
+    # the packets are only kept by the queue, so their values count too
+    tracemalloc.start()
+    queued = [make(create_packet(i)) for i in range(PACKETS)]
+    (size, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, queued
+
+def timing(make, queued):
+    packets = [create_packet(i) for i in range(PACKETS)]
+    start = time.time()
+    for packet in packets:
+        make(packet)
+    elapsed = time.time() - start
+    start = time.time()
+    for record in queued:
+        if isinstance(record, CompactRecord):
+            record.to_dict()
+        else:
+            dict(record)
+    return elapsed, time.time() - start
+
+def main():
+    random.seed(0)
+    print("%d loop packets of %d fields" % (PACKETS, len(FIELDS) + 2))
+    print("%-14s %10s %14s %16s" % ('', 'MB', 'queue us each', 'to dict us each'))
+    for (name, make) in (('dict', lambda packet: packet), ('CompactRecord', CompactRecord.from_record)):
+        (size, queued) = memory(make)
+        (elapsed, restore) = timing(make, queued)
+        print("%-14s %10.1f %14.2f %16.2f" % (name, size / 1e6,
+                                               elapsed / PACKETS * 1e6, restore / PACKETS * 1e6))
+
+if __name__ == '__main__':
+    main()
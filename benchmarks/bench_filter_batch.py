@@ -0,0 +1,75 @@
+# pylint: disable=missing-docstring, invalid-name, wrong-import-position
+"""
+Formatting 100,000 archive records for publishing, one at a time with
+filter_data and a field at a time with filter_data_batch, with and without
+numpy. The topic converts the temperatures, pressure, wind, and rain to metric
+with a format, as a topic with inputs does, and the other fields as they are.
+
+Run from the root of the repository with the weewx package installed:
+
+    PYTHONPATH=bin python benchmarks/bench_filter_batch.py
+"""
+import random
+import time
+
+import mock
+
+import user.mqttpublish
+from user.mqttpublish import MQTTPublishThread, TemplateCache
+
+RECORDS = 100000
+BATCH = 1000
+INPUTS = {'outTemp': {'units': 'degree_C', 'format': '%.1f'},
+          'inTemp': {'units': 'degree_C', 'format': '%.1f'},
+          'dewpoint': {'units': 'degree_C', 'format': '%.1f'},
+          'barometer': {'units': 'mbar', 'format': '%.1f'},
+          'windSpeed': {'units': 'km_per_hour', 'format': '%.0f'},
+          'windGust': {'units': 'km_per_hour', 'format': '%.0f'},
+          'rain': {'units': 'mm', 'format': '%.1f'}}
+
+def create_records(count):
+    records = []
+    for i in range(count):
+        records.append({'dateTime': 1700000000 + i * 300, 'usUnits': 1, 'interval': 5,
+                        'outTemp': random.uniform(0, 100), 'inTemp': random.uniform(60, 80),
+                        'dewpoint': random.uniform(0, 70), 'outHumidity': random.uniform(0, 100),
+                        'barometer': random.uniform(29, 31), 'windSpeed': random.uniform(0, 30),
+                        'windGust': random.uniform(0, 40), 'windDir': random.uniform(0, 360),
+                        'rain': random.choice([0.0, 0.01, 0.02])})
+    return records
+
+def one_at_a_time(records):
+    templates = TemplateCache(1000)
+    return [MQTTPublishThread.filter_data(True, templates, INPUTS, True, 'string', record)
+            for record in records]
+
+def batched(records):
+    templates = TemplateCache(1000)
+    data = []
+    for i in range(0, len(records), BATCH):
+        data.extend(MQTTPublishThread.filter_data_batch(True, templates, INPUTS, True, 'string',
+                                                        records[i:i + BATCH]))
+    return data
+
+def timed(function, records):
+    start = time.time()
+    data = function(records)
+    return (time.time() - start, data)
+
+def main():
+    random.seed(0)
+    records = create_records(RECORDS)
+    print("%d archive records, %d a batch" % (RECORDS, BATCH))
+    (elapsed, expected) = timed(one_at_a_time, records)
+    print("%-28s %6.2f seconds" % ('filter_data', elapsed))
+    if user.mqttpublish.numpy is not None:
+        (elapsed, data) = timed(batched, records)
+        assert data == expected
+        print("%-28s %6.2f seconds" % ('filter_data_batch, numpy', elapsed))
+    with mock.patch('user.mqttpublish.numpy', None):
+        (elapsed, data) = timed(batched, records)
+    assert data == expected
+    print("%-28s %6.2f seconds" % ('filter_data_batch, python', elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# pylint: disable=missing-docstring, invalid-name, wrong-import-position
+"""
+Handing records from the weewx engine thread to the publishing thread,
+Queue.Queue against BatchQueue:
+- what a put costs the engine thread, while the publishing thread takes the records
+- records from history at 10000 a second, in bursts of 100 every 10 milliseconds:
+  the cost of a put, how many times the publishing thread was woken up,
+  and the CPU used by both threads
+
+Run from the root of the repository with the weewx and paho packages installed:
+
+    PYTHONPATH=bin python benchmarks/bench_handoff.py
+"""
+import threading
+import time
+
+try:
+    import queue as Queue
+except ImportError:
+    import Queue
+
+from user.mqttpublish import BatchQueue
+
+RECORDS = 200000
+RATE = 10000
+BURST = 100
+PACED_SECONDS = 3
+
+def create_record(timestamp):
+    return {'dateTime': timestamp, 'usUnits': 1, 'outTemp': 20.0, 'barometer': 30.0}
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def start_consumer(queue):
+    counts = {'records': 0, 'wakeups': 0}
+    def consume():
+        waiting = True
+        while True:
+            if waiting:
+                counts['wakeups'] += 1
+            record = queue.get()
+            if record is None:
+                return
+            counts['records'] += 1
+            # Queue.Queue blocks in get once it is empty, BatchQueue once its batch is used up
+            waiting = queue.qsize() == 0
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    return consumer, counts
+
+def put_cost(queue):
+    (consumer, _) = start_consumer(queue)
+    record = create_record(0)
+    start = time.time()
+    for _ in range(RECORDS):
+        queue.put(record)
+    elapsed = time.time() - start
+    queue.put(None)
+    consumer.join()
+    return elapsed / RECORDS
+
+def paced(queue):
+    (consumer, counts) = start_consumer(queue)
+    record = create_record(0)
+    costs = []
+    cpu_start = time.process_time()
+    start = time.time()
+    for i in range(RATE * PACED_SECONDS):
+        if i % BURST == 0:
+            delay = start + i / float(RATE) - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        before = time.perf_counter()
+        queue.put(record)
+        costs.append(time.perf_counter() - before)
+    queue.put(None)
+    consumer.join()
+    cpu = time.process_time() - cpu_start
+    return costs, counts, cpu
+
+def main():
+    print("%d puts while the publishing thread takes them, microseconds a put" % RECORDS)
+    for queue_class in (Queue.Queue, BatchQueue):
+        print("%-12s %8.2f" % (queue_class.__name__, put_cost(queue_class()) * 1e6))
+    print("%d records a second in bursts of %d, for %d seconds" % (RATE, BURST, PACED_SECONDS))
+    print("%-12s %12s %12s %10s %10s" % ('', 'put p50 us', 'put p99 us', 'wakeups', 'cpu s'))
+    for queue_class in (Queue.Queue, BatchQueue):
+        (costs, counts, cpu) = paced(queue_class())
+        print("%-12s %12.2f %12.2f %10d %10.2f" % (queue_class.__name__,
+                                                  percentile(costs, 0.5) * 1e6,
+                                                  percentile(costs, 0.99) * 1e6,
+                                                  counts['wakeups'], cpu))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# pylint: disable=missing-docstring, invalid-name, wrong-import-position
+"""
+Compare the bytes on the wire for individual topics with MQTT v3.1.1 and
+MQTT v5 topic aliases, for a typical 40 field archive record.
+
+Run from the root of the repository with the weewx and paho packages installed:
+
+    PYTHONPATH=bin python benchmarks/bench_topic_alias.py
+"""
+import random
+import time
+
+import paho.mqtt.client as mqtt
+
+from user.mqttpublish import MQTTPublish, MQTTPublishThread
+
+FIELDS = [
+    'barometer', 'pressure', 'altimeter', 'inTemp', 'outTemp', 'inHumidity', 'outHumidity',
+    'windSpeed', 'windDir', 'windGust', 'windGustDir', 'rainRate', 'rain', 'dewpoint',
+    'windchill', 'heatindex', 'ET', 'radiation', 'UV', 'extraTemp1', 'extraTemp2',
+    'extraTemp3', 'soilTemp1', 'soilTemp2', 'soilTemp3', 'soilTemp4', 'leafTemp1',
+    'leafTemp2', 'extraHumid1', 'extraHumid2', 'soilMoist1', 'soilMoist2', 'soilMoist3',
+    'soilMoist4', 'leafWet1', 'leafWet2', 'rxCheckPercent',
+]
+RECORDS = 100
+
+class RecordingClient(object):
+    """ Stands in for the paho client and counts the PUBLISH packet bytes. """
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.bytes = 0
+
+    def publish(self, topic, payload, qos=0, retain=False, properties=None): # pylint: disable=unused-argument
+        payload = str(payload).encode('utf-8')
+        remaining = 2 + len(topic.encode('utf-8')) + len(payload)
+        if qos > 0:
+            remaining += 2
+        if self.protocol == mqtt.MQTTv5:
+            remaining += len(properties.pack())
+        header = 2
+        while remaining >= 128 ** (header - 1):
+            header += 1
+        self.bytes += header + remaining
+        return mqtt.MQTT_ERR_SUCCESS, None
+
+def create_record(timestamp):
+    record = {'dateTime': timestamp, 'usUnits': 1, 'interval': 5}
+    for field in FIELDS:
+        record[field] = round(random.uniform(0, 100), 3)
+    return record
+
+def run(protocol, topic_alias_maximum):
+    site_dict = {'topics': {'weather': {'type': 'individual',
+                                        'augment_record': False,
+                                        'unit_system': 'US'}}}
+    topics = {'weather': {}}
+    MQTTPublish._init_topic_dict('weather', site_dict, topics['weather']) # pylint: disable=protected-access
+
+    publisher = MQTTPublishThread('bench', None, 'mqtt://localhost:1883/', topics, protocol=protocol)
+    client = RecordingClient(publisher.protocol)
+    publisher.persist_connection = True
+    publisher.clients = {publisher.connections[0]: client}
+    publisher.topic_aliases[publisher.connections[0]].reset(topic_alias_maximum)
+
+    now = int(time.time())
+    per_record = []
+    for i in range(RECORDS):
+        before = client.bytes
+        publisher.process_record(create_record(now + i * 300), None)
+        per_record.append(client.bytes - before)
+    return per_record
+
+def main():
+    random.seed(0)
+    v311 = run('MQTTv311', 0)
+    random.seed(0)
+    v5_no_alias = run('MQTTv5', 0)
+    random.seed(0)
+    v5 = run('MQTTv5', 65535)
+
+    print("%d records of %d fields, bytes of PUBLISH packets per record" % (RECORDS, len(FIELDS) + 3))
+    print("%-22s %8s %8s" % ('', 'first', 'steady'))
+    print("%-22s %8d %8d" % ('MQTT v3.1.1', v311[0], v311[-1]))
+    print("%-22s %8d %8d" % ('MQTT v5, no aliases', v5_no_alias[0], v5_no_alias[-1]))
+    print("%-22s %8d %8d" % ('MQTT v5, topic aliases', v5[0], v5[-1]))
+    print("total bytes: v3.1.1 %d, v5 with aliases %d (%.0f%% of v3.1.1)" %
+          (sum(v311), sum(v5), 100.0 * sum(v5) / sum(v311)))
+
+if __name__ == '__main__':
+    main()
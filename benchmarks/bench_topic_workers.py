@@ -0,0 +1,90 @@
+# pylint: disable=missing-docstring, invalid-name, wrong-import-position
+"""
+End to end latency of a record, from the weewx queue until the broker has all
+its messages, publishing the topics one after another and with topic_workers.
+
+Each topic publishes the 4 fields of the record individually, with QoS 1,
+on its own connection. The stand-in broker takes 2 milliseconds to acknowledge
+each message, and max_queued_messages = 1 makes each message wait for the
+acknowledgement of the one before, as a topic retrying or publishing with
+QoS 2 would.
+
+Run from the root of the repository with the weewx and paho packages installed:
+
+    PYTHONPATH=bin python benchmarks/bench_topic_workers.py
+"""
+import random
+import time
+
+try:
+    import queue as Queue
+except ImportError:
+    import Queue
+
+from user.mqttbroker import MQTTBroker
+from user.mqttpublish import MQTTPublish, MQTTPublishThread
+
+RECORDS = 200
+ACK_DELAY = 0.002
+# an individual message for each field of the record
+FIELDS = 4
+
+def create_topics(count):
+    site_dict = {'topics': {}}
+    for i in range(count):
+        site_dict['topics']['weather/%d' % i] = {'type': 'individual',
+                                                 'binding': 'loop',
+                                                 'qos': 1,
+                                                 'augment_record': False,
+                                                 'unit_system': 'US'}
+    topics = {}
+    for topic in site_dict['topics']:
+        topics[topic] = {}
+        MQTTPublish._init_topic_dict(topic, site_dict, topics[topic]) # pylint: disable=protected-access
+    return topics
+
+def create_record(timestamp):
+    return {'dateTime': timestamp, 'usUnits': 1,
+            'outTemp': round(random.uniform(0, 100), 3),
+            'barometer': round(random.uniform(29, 31), 3)}
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def run(topic_count, topic_workers):
+    broker = MQTTBroker().start()
+    broker.ack_delay = ACK_DELAY
+    queue = Queue.Queue()
+    publisher = MQTTPublishThread('bench', queue, broker.url, create_topics(topic_count),
+                                  persist_connection=True, connections=topic_count,
+                                  max_queued_messages=1, topic_workers=topic_workers)
+    publisher.start()
+    now = int(time.time())
+    latencies = []
+    for i in range(RECORDS):
+        start = time.time()
+        queue.put(create_record(now + i))
+        expected = (i + 1) * topic_count * FIELDS
+        if not broker.wait_for(lambda b, expected=expected: len(b.messages) >= expected, 60):
+            raise RuntimeError("broker received %d of %d messages" % (len(broker.messages), expected))
+        latencies.append(time.time() - start)
+    queue.put(None)
+    publisher.join(20)
+    publisher.disconnect()
+    broker.stop()
+    return latencies
+
+def main():
+    random.seed(0)
+    print("%d records, end to end latency in milliseconds" % RECORDS)
+    print("%-8s %-14s %8s %8s" % ('topics', 'topic_workers', 'p50', 'p99'))
+    for topic_count in (1, 20):
+        for topic_workers in (0, topic_count):
+            latencies = run(topic_count, topic_workers)
+            print("%-8d %-14d %8.1f %8.1f" % (topic_count, topic_workers,
+                                              percentile(latencies, 0.5) * 1000,
+                                              percentile(latencies, 0.99) * 1000))
+
+if __name__ == '__main__':
+    main()
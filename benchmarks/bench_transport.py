@@ -0,0 +1,110 @@
+# pylint: disable=missing-docstring, invalid-name, wrong-import-position
+"""
+End to end publishing against the in-process stand-in broker, no network access
+or external broker needed:
+- throughput of the thread and selector network loops, QoS 0 and 1
+- the time to resume publishing after the broker drops the connection
+- what piles up in the client while a slow broker holds back acknowledgements,
+  with and without max_queued_messages
+
+Run from the root of the repository with the weewx and paho packages installed:
+
+    PYTHONPATH=bin python benchmarks/bench_transport.py
+"""
+import random
+import time
+
+try:
+    import queue as Queue
+except ImportError:
+    import Queue
+
+from user.mqttbroker import MQTTBroker
+from user.mqttpublish import MQTTPublish, MQTTPublishThread, WakeupQueue
+
+RECORDS = 2000
+
+def create_topics(qos):
+    site_dict = {'topics': {'weather/loop': {'binding': 'loop',
+                                             'qos': qos,
+                                             'augment_record': False,
+                                             'unit_system': 'US'}}}
+    topics = {'weather/loop': {}}
+    MQTTPublish._init_topic_dict('weather/loop', site_dict, topics['weather/loop']) # pylint: disable=protected-access
+    return topics
+
+def create_record(timestamp):
+    return {'dateTime': timestamp, 'usUnits': 1,
+            'outTemp': round(random.uniform(0, 100), 3),
+            'barometer': round(random.uniform(29, 31), 3)}
+
+def wait_for(broker, count, timeout=60):
+    if not broker.wait_for(lambda b: len(b.messages) >= count, timeout):
+        raise RuntimeError("broker received %d of %d messages" % (len(broker.messages), count))
+
+def throughput(network_loop, qos):
+    broker = MQTTBroker().start()
+    queue = WakeupQueue() if network_loop == 'selector' else Queue.Queue()
+    publisher = MQTTPublishThread('bench', queue, broker.url, create_topics(qos),
+                                  persist_connection=True, network_loop=network_loop)
+    publisher.start()
+    now = int(time.time())
+    start = time.time()
+    for i in range(RECORDS):
+        queue.put(create_record(now + i))
+    wait_for(broker, RECORDS)
+    elapsed = time.time() - start
+    queue.put(None)
+    publisher.join(20)
+    publisher.disconnect()
+    broker.stop()
+    return RECORDS / elapsed, broker.bytes_received
+
+def reconnect():
+    broker = MQTTBroker().start()
+    queue = Queue.Queue()
+    publisher = MQTTPublishThread('bench', queue, broker.url, create_topics(1),
+                                  persist_connection=True, retry_wait=0.1)
+    publisher.start()
+    queue.put(create_record(1))
+    wait_for(broker, 1)
+    start = time.time()
+    broker.drop_connections()
+    queue.put(create_record(2))
+    wait_for(broker, 2)
+    elapsed = time.time() - start
+    queue.put(None)
+    publisher.join(20)
+    publisher.disconnect()
+    broker.stop()
+    return elapsed
+
+def slow_broker(records=500, **kwargs):
+    broker = MQTTBroker().start()
+    broker.ack = False
+    publisher = MQTTPublishThread('bench', None, broker.url, create_topics(1),
+                                  persist_connection=True, **kwargs)
+    transport = publisher.clients[publisher.connections[0]]
+    for i in range(records):
+        publisher.process_record(create_record(i), None)
+    health = transport.health()
+    publisher.disconnect()
+    broker.stop()
+    return health, publisher.shed
+
+def main():
+    random.seed(0)
+    print("%d records, messages per second and bytes received by the broker" % RECORDS)
+    for network_loop in ('thread', 'selector'):
+        for qos in (0, 1):
+            (rate, received) = throughput(network_loop, qos)
+            print("%-10s QoS %d %10.0f %10d" % (network_loop, qos, rate, received))
+    print("resumed publishing %.3f seconds after the connection was dropped" % reconnect())
+    print("broker not acknowledging, after 500 records:")
+    for kwargs in ({}, {'max_queued_messages': 100, 'queue_full': 'shed'}):
+        (health, shed) = slow_broker(**kwargs)
+        print("%-52s %4d in flight, %4d queued in the client, %4d shed" %
+              (kwargs or 'no limit', health.in_flight, health.queued, shed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+# pylint: disable=missing-docstring, invalid-name
+# pylint: disable=bad-option-value, useless-object-inheritance
+# pylint: enable=bad-option-value
+"""
+A minimal MQTT 3.1.1 broker that runs in process on localhost.
+It stands in for an external broker in the tests and benchmarks, it is not a real broker.
+It does not route messages to subscribers, it records what it receives,
+and sends the messages a test gives it to the clients subscribed.
+
+Supported:
+- CONNECT/CONNACK, including clean session and the session present flag
+- PUBLISH with QoS 0, 1 and 2, the acknowledgements can be held back to keep
+  messages in flight, or delayed to act as a slow broker
+- SUBSCRIBE/SUBACK, granting QoS 0, and send to publish to the clients
+  subscribed to a topic, with the filters matched exactly or ending in #
+- PINGREQ/PINGRESP and DISCONNECT
+
+For example, to benchmark against a broker that takes 50 milliseconds to acknowledge:
+
+    broker = MQTTBroker().start()
+    broker.ack_delay = 0.05
+    ... publish to broker.url ...
+    print(len(broker.messages), broker.bytes_received)
+    broker.stop()
+"""
+import collections
+import socket
+import struct
+import threading
+import time
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+PUBCOMP = 7
+SUBSCRIBE = 8
+SUBACK = 9
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+Connect = collections.namedtuple('Connect', ['client_id', 'clean_session', 'session_present'])
+Publish = collections.namedtuple('Publish', ['client_id', 'topic', 'payload', 'qos', 'retain', 'dup', 'mid'])
+Subscribe = collections.namedtuple('Subscribe', ['client_id', 'topic'])
+
+def _read_exactly(sock, count):
+    data = b''
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+def _read_packet(sock):
+    """ Return the fixed header byte, the rest of the packet, and its size in bytes. """
+    header = ord(_read_exactly(sock, 1))
+    remaining = 0
+    multiplier = 1
+    size = 1
+    while True:
+        byte = ord(_read_exactly(sock, 1))
+        size += 1
+        remaining += (byte & 0x7f) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+    return header, _read_exactly(sock, remaining), size + remaining
+
+def _read_string(data, offset):
+    (length,) = struct.unpack('!H', data[offset:offset + 2])
+    return data[offset + 2:offset + 2 + length], offset + 2 + length
+
+def _encode_length(length):
+    encoded = b''
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        encoded += struct.pack('!B', byte)
+        if not length:
+            return encoded
+
+def _matches(topic_filter, topic):
+    if topic_filter.endswith('#'):
+        return topic.startswith(topic_filter[:-1])
+    return topic_filter == topic
+
+class MQTTBroker(object):
+    """ Accept MQTT connections on localhost and record the packets. """
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(5)
+        self.port = self.server.getsockname()[1]
+        self.url = 'mqtt://%s:%s/' % (host, self.port)
+        # when False, QoS 1 and 2 messages are left in flight
+        self.ack = True
+        # seconds to wait before acknowledging a message
+        self.ack_delay = 0
+        self.bytes_received = 0
+        # client id to the set of packet ids received but not acknowledged
+        self.sessions = {}
+        self.connects = []
+        self.messages = []
+        self.subscriptions = []
+        self.lock = threading.Condition()
+        self._connections = []
+        self._subscribed = []
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._accept)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self.server.close()
+        self.drop_connections()
+
+    def drop_connections(self):
+        """ Close the client connections abruptly, as a network failure would. """
+        with self.lock:
+            connections = list(self._connections)
+            self._connections = []
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+            connection.close()
+
+    def wait_for(self, condition, timeout=10.0):
+        """ Wait until condition(self) is true. """
+        with self.lock:
+            return self._wait(lambda: condition(self), timeout)
+
+    def _wait(self, predicate, timeout):
+        end = time.time() + timeout
+        while not predicate():
+            remaining = end - time.time()
+            if remaining <= 0:
+                return False
+            self.lock.wait(remaining)
+        return True
+
+    def _accept(self):
+        while self._running:
+            try:
+                (connection, _) = self.server.accept()
+            except (socket.error, OSError):
+                break
+            with self.lock:
+                self._connections.append(connection)
+            thread = threading.Thread(target=self._serve, args=(connection,))
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, connection):
+        client_id = None
+        try:
+            while True:
+                (header, data, size) = _read_packet(connection)
+                with self.lock:
+                    self.bytes_received += size
+                packet_type = header >> 4
+                if packet_type == CONNECT:
+                    client_id = self._connect(connection, data)
+                elif packet_type == PUBLISH:
+                    self._publish(connection, client_id, header, data)
+                elif packet_type == PUBREL:
+                    (mid,) = struct.unpack('!H', data[:2])
+                    connection.sendall(struct.pack('!BBH', PUBCOMP << 4, 2, mid))
+                elif packet_type == PUBACK:
+                    pass
+                elif packet_type == SUBSCRIBE:
+                    self._subscribe(connection, client_id, data)
+                elif packet_type == PINGREQ:
+                    connection.sendall(struct.pack('!BB', PINGRESP << 4, 0))
+                elif packet_type == DISCONNECT:
+                    break
+        except (EOFError, socket.error, OSError):
+            pass
+        finally:
+            with self.lock:
+                self._subscribed = [(subscribed, topic_filter) for (subscribed, topic_filter) in self._subscribed
+                                    if subscribed is not connection]
+            connection.close()
+
+    def send(self, topic, payload):
+        """ Publish payload to the clients subscribed to topic, with QoS 0.
+            Returns the number of clients it was sent to. """
+        if not isinstance(payload, bytes):
+            payload = payload.encode('utf-8')
+        topic = topic.encode('utf-8')
+        data = struct.pack('!H', len(topic)) + topic + payload
+        packet = struct.pack('!B', PUBLISH << 4) + _encode_length(len(data)) + data
+        with self.lock:
+            connections = [connection for (connection, topic_filter) in self._subscribed
+                           if _matches(topic_filter, topic.decode('utf-8'))]
+        sent = 0
+        for connection in set(connections):
+            try:
+                connection.sendall(packet)
+                sent += 1
+            except (socket.error, OSError):
+                pass
+        return sent
+
+    def _subscribe(self, connection, client_id, data):
+        (mid,) = struct.unpack('!H', data[:2])
+        offset = 2
+        granted = b''
+        with self.lock:
+            while offset < len(data):
+                (topic_filter, offset) = _read_string(data, offset)
+                offset += 1  # requested QoS
+                self._subscribed.append((connection, topic_filter.decode('utf-8')))
+                self.subscriptions.append(Subscribe(client_id, topic_filter.decode('utf-8')))
+                granted += struct.pack('!B', 0)
+            self.lock.notify_all()
+        connection.sendall(struct.pack('!BBH', SUBACK << 4, 2 + len(granted), mid) + granted)
+
+    def _connect(self, connection, data):
+        (_, offset) = _read_string(data, 0)  # protocol name
+        flags = ord(data[offset + 1:offset + 2])
+        offset += 4  # level, flags, keep alive
+        (client_id, offset) = _read_string(data, offset)
+        client_id = client_id.decode('utf-8')
+        clean_session = bool(flags & 0x02)
+        with self.lock:
+            if clean_session:
+                self.sessions.pop(client_id, None)
+            session_present = client_id in self.sessions
+            self.sessions.setdefault(client_id, set())
+            self.connects.append(Connect(client_id, clean_session, session_present))
+            self.lock.notify_all()
+        connection.sendall(struct.pack('!BBBB', CONNACK << 4, 2, int(session_present), 0))
+        return client_id
+
+    def _publish(self, connection, client_id, header, data):
+        qos = (header >> 1) & 0x03
+        (topic, offset) = _read_string(data, 0)
+        mid = None
+        if qos > 0:
+            (mid,) = struct.unpack('!H', data[offset:offset + 2])
+            offset += 2
+        with self.lock:
+            self.messages.append(Publish(client_id, topic.decode('utf-8'), data[offset:], qos,
+                                         bool(header & 0x01), bool(header & 0x08), mid))
+            ack = self.ack
+            ack_delay = self.ack_delay
+            if qos > 0 and not ack:
+                self.sessions[client_id].add(mid)
+            self.lock.notify_all()
+        if qos > 0 and ack:
+            if ack_delay:
+                time.sleep(ack_delay)
+            with self.lock:
+                self.sessions.get(client_id, set()).discard(mid)
+            # QoS 2 is completed by the PUBREL
+            packet_type = PUBACK if qos == 1 else PUBREC
+            connection.sendall(struct.pack('!BBH', packet_type << 4, 2, mid))
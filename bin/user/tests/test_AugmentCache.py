@@ -0,0 +1,103 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import time
+
+import unittest
+import mock
+
+from user.mqttpublish import AugmentCache, MQTTPublishThread
+
+class TestAugmentCache(unittest.TestCase):
+    def test_reused(self):
+        SUT = AugmentCache(60)
+        now = time.time()
+
+        SUT.put({'dateTime': now, 'usUnits': 1}, {'dayRain': 0.1})
+
+        self.assertEqual(SUT.get({'dateTime': now + 2, 'usUnits': 1}), {'dayRain': 0.1})
+
+    def test_expired(self):
+        SUT = AugmentCache(60)
+        now = time.time()
+        SUT.put({'dateTime': now, 'usUnits': 1}, {'dayRain': 0.1})
+
+        with mock.patch('user.mqttpublish.time.time', return_value=now + 61):
+            self.assertIsNone(SUT.get({'dateTime': now + 61, 'usUnits': 1}))
+
+    def test_archive_record(self):
+        SUT = AugmentCache(60)
+        now = time.time()
+        SUT.put({'dateTime': now, 'usUnits': 1}, {'dayRain': 0.1})
+
+        SUT.invalidate(now + 1)
+
+        self.assertIsNone(SUT.get({'dateTime': now + 2, 'usUnits': 1}))
+
+    def test_older_than_archive_record_not_kept(self):
+        SUT = AugmentCache(60)
+        now = time.time()
+        SUT.invalidate(now)
+
+        SUT.put({'dateTime': now - 1, 'usUnits': 1}, {'dayRain': 0.1})
+
+        self.assertIsNone(SUT.get({'dateTime': now + 2, 'usUnits': 1}))
+
+    def test_midnight(self):
+        SUT = AugmentCache(3 * 24 * 3600)
+        now = time.time()
+        SUT.put({'dateTime': now, 'usUnits': 1}, {'dayRain': 0.1})
+
+        self.assertIsNone(SUT.get({'dateTime': now + 2 * 24 * 3600, 'usUnits': 1}))
+
+    def test_unit_system(self):
+        SUT = AugmentCache(60)
+        now = time.time()
+        SUT.put({'dateTime': now, 'usUnits': 1}, {'dayRain': 0.1})
+
+        self.assertIsNone(SUT.get({'dateTime': now, 'usUnits': 16}))
+
+class TestGetRecord(unittest.TestCase):
+    def create_thread(self):
+        return MQTTPublishThread(None, None,
+                                 server_url='mqtt://localhost:1883/',
+                                 topics={},
+                                 augment_cache=AugmentCache(60))
+
+    def test_loop_packets_queried_once(self):
+        SUT = self.create_thread()
+        dbmanager = mock.Mock()
+        dbmanager.getSql.return_value = (0.1, 1, 1)
+        now = time.time()
+
+        first = SUT.get_record({'dateTime': now, 'usUnits': 1}, dbmanager)
+        second = SUT.get_record({'dateTime': now + 2, 'usUnits': 1, 'dayRain': 0.5}, dbmanager)
+
+        self.assertEqual(dbmanager.getSql.call_count, 3)
+        self.assertEqual(first, {'dateTime': now, 'usUnits': 1, 'hourRain': 0.1, 'rain24': 0.1, 'dayRain': 0.1})
+        self.assertEqual(second, {'dateTime': now + 2, 'usUnits': 1, 'hourRain': 0.1, 'rain24': 0.1, 'dayRain': 0.5})
+
+    def test_field_missing_from_later_packet(self):
+        SUT = self.create_thread()
+        dbmanager = mock.Mock()
+        dbmanager.getSql.return_value = (0.1, 1, 1)
+        now = time.time()
+
+        first = SUT.get_record({'dateTime': now, 'usUnits': 1, 'dayRain': 0.5}, dbmanager)
+        second = SUT.get_record({'dateTime': now + 2, 'usUnits': 1}, dbmanager)
+
+        self.assertEqual(dbmanager.getSql.call_count, 3)
+        self.assertEqual(first['dayRain'], 0.5)
+        self.assertEqual(second, {'dateTime': now + 2, 'usUnits': 1, 'hourRain': 0.1, 'rain24': 0.1, 'dayRain': 0.1})
+
+    def test_archive_records_queried(self):
+        SUT = self.create_thread()
+        dbmanager = mock.Mock()
+        dbmanager.getSql.return_value = (0.1, 1, 1)
+        now = time.time()
+
+        SUT.get_record({'dateTime': now, 'usUnits': 1, 'interval': 5}, dbmanager)
+        SUT.get_record({'dateTime': now + 300, 'usUnits': 1, 'interval': 5}, dbmanager)
+
+        self.assertEqual(dbmanager.getSql.call_count, 6)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,63 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import threading
+
+import unittest
+
+try:
+    import queue as Queue
+except ImportError:
+    import Queue
+
+from user.mqttpublish import BatchQueue
+
+class TestBatchQueue(unittest.TestCase):
+    def test_in_order(self):
+        SUT = BatchQueue()
+
+        for i in range(3):
+            SUT.put(i)
+
+        self.assertEqual(SUT.qsize(), 3)
+        self.assertEqual([SUT.get() for _ in range(3)], [0, 1, 2])
+        self.assertEqual(SUT.qsize(), 0)
+
+    def test_taken_in_one_batch(self):
+        SUT = BatchQueue()
+        for i in range(3):
+            SUT.put(i)
+
+        SUT.get()
+        SUT.put(3)
+
+        self.assertEqual([SUT.get(), SUT.get()], [1, 2])
+        self.assertEqual(SUT.batches, 1)
+        self.assertEqual(SUT.get(), 3)
+        self.assertEqual(SUT.batches, 2)
+
+    def test_empty(self):
+        SUT = BatchQueue()
+
+        with self.assertRaises(Queue.Empty):
+            SUT.get(False)
+        with self.assertRaises(Queue.Empty):
+            SUT.get(timeout=0.1)
+
+    def test_wakes_up_consumer(self):
+        SUT = BatchQueue()
+        count = 10000
+        received = []
+        def consume():
+            while len(received) < count:
+                received.append(SUT.get(timeout=10))
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+
+        for i in range(count):
+            SUT.put(i)
+
+        consumer.join(20)
+        self.assertFalse(consumer.is_alive())
+        self.assertEqual(received, list(range(count)))
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,87 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import random
+import string
+
+import unittest
+import mock
+
+from user.mqttpublish import CircuitBreaker
+
+def random_string():
+    # pylint: disable=unused-variable
+    return ''.join([random.choice(string.ascii_letters + string.digits) for n in range(32)])
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('user.mqttpublish.time')
+        self.mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_time.time.return_value = 1000
+
+    def test_closed(self):
+        SUT = CircuitBreaker(random_string(), 3, 60)
+
+        self.assertEqual(SUT.state, CircuitBreaker.CLOSED)
+        self.assertTrue(SUT.allow())
+
+    def test_opens_after_threshold(self):
+        SUT = CircuitBreaker(random_string(), 3, 60)
+
+        SUT.record_failure()
+        SUT.record_failure()
+        self.assertTrue(SUT.allow())
+        SUT.record_failure()
+
+        self.assertEqual(SUT.state, CircuitBreaker.OPEN)
+        self.assertFalse(SUT.allow())
+
+    def test_success_resets_failures(self):
+        SUT = CircuitBreaker(random_string(), 3, 60)
+
+        SUT.record_failure()
+        SUT.record_failure()
+        SUT.record_success()
+        SUT.record_failure()
+
+        self.assertEqual(SUT.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_after_timeout(self):
+        SUT = CircuitBreaker(random_string(), 1, 60)
+        SUT.record_failure()
+
+        self.mock_time.time.return_value = 1059
+        self.assertFalse(SUT.allow())
+        self.mock_time.time.return_value = 1060
+
+        self.assertEqual(SUT.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(SUT.allow())
+
+    def test_probe_succeeds(self):
+        SUT = CircuitBreaker(random_string(), 2, 60)
+        SUT.record_failure()
+        SUT.record_failure()
+        self.mock_time.time.return_value = 1060
+        self.assertTrue(SUT.allow())
+
+        SUT.record_success()
+
+        self.assertEqual(SUT.state, CircuitBreaker.CLOSED)
+
+    def test_probe_fails(self):
+        SUT = CircuitBreaker(random_string(), 2, 60)
+        SUT.record_failure()
+        SUT.record_failure()
+        self.mock_time.time.return_value = 1060
+        self.assertTrue(SUT.allow())
+
+        # a single failure opens the circuit again, for another reset_timeout
+        SUT.record_failure()
+
+        self.assertEqual(SUT.state, CircuitBreaker.OPEN)
+        self.mock_time.time.return_value = 1119
+        self.assertFalse(SUT.allow())
+        self.mock_time.time.return_value = 1120
+        self.assertTrue(SUT.allow())
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,66 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import unittest
+
+from user.mqttpublish import CompactRecord
+
+class TestCompactRecord(unittest.TestCase):
+    def test_round_trip(self):
+        record = {'dateTime': 1700000000, 'usUnits': 1, 'outTemp': 20.5, 'barometer': 30.01}
+
+        SUT = CompactRecord.from_record(record)
+
+        self.assertIsInstance(SUT, CompactRecord)
+        self.assertEqual(dict(SUT), record)
+        self.assertIsInstance(SUT['dateTime'], int)
+        self.assertIsInstance(SUT['outTemp'], float)
+
+    def test_to_dict(self):
+        record = {'dateTime': 1700000000, 'usUnits': 1, 'outTemp': 20.5, 'UV': None}
+
+        result = CompactRecord.from_record(record).to_dict()
+
+        self.assertEqual(result, {'dateTime': 1700000000, 'usUnits': 1, 'outTemp': 20.5})
+        self.assertIsInstance(result['usUnits'], int)
+
+    def test_fields(self):
+        record = {'dateTime': 1, 'usUnits': 1, 'outTemp': 20.5, 'extraTemp1': 30.0}
+
+        SUT = CompactRecord.from_record(record, ['dateTime', 'usUnits', 'outTemp', 'interval'])
+
+        self.assertEqual(dict(SUT), {'dateTime': 1, 'usUnits': 1, 'outTemp': 20.5})
+        self.assertNotIn('interval', SUT)
+        self.assertNotIn('extraTemp1', SUT)
+
+    def test_missing_value(self):
+        SUT = CompactRecord.from_record({'dateTime': 1, 'outTemp': None})
+
+        self.assertNotIn('outTemp', SUT)
+        self.assertIsNone(SUT.get('outTemp'))
+        self.assertEqual(len(SUT), 1)
+        with self.assertRaises(KeyError):
+            SUT['outTemp'] # pylint: disable=pointless-statement
+
+    def test_schema_shared(self):
+        first = CompactRecord.from_record({'dateTime': 1, 'outTemp': 20.0})
+        second = CompactRecord.from_record({'dateTime': 2, 'outTemp': 21.0})
+
+        self.assertIs(first.schema, second.schema)
+
+    def test_not_a_number(self):
+        record = {'dateTime': 1, 'status': 'ok'}
+
+        self.assertIs(CompactRecord.from_record(record), record)
+
+    def test_not_a_number_fields(self):
+        record = {'dateTime': 1, 'status': 'ok', 'outTemp': 20.0, 'inTemp': 21.0}
+
+        self.assertEqual(CompactRecord.from_record(record, ['dateTime', 'status', 'outTemp']),
+                         {'dateTime': 1, 'status': 'ok', 'outTemp': 20.0})
+
+    def test_boolean_not_compacted(self):
+        record = {'dateTime': 1, 'charging': True}
+
+        self.assertIs(CompactRecord.from_record(record), record)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,76 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import time
+
+import unittest
+import mock
+
+from user.mqttpublish import ConditionsCache
+
+class TestConditionsCache(unittest.TestCase):
+    # noon, so that the records are all on the same day
+    noon = int(time.mktime((2024, 6, 1, 12, 0, 0, 0, 0, -1)))
+
+    def packet(self, offset, usUnits=1, **fields):
+        record = {'dateTime': self.noon + offset, 'usUnits': usUnits}
+        record.update(fields)
+        return record
+
+    def test_no_records(self):
+        self.assertIsNone(ConditionsCache().conditions())
+
+    def test_current_highs_and_lows(self):
+        SUT = ConditionsCache()
+        SUT.add(self.packet(0, outTemp=70.0, windSpeed=5.0))
+        SUT.add(self.packet(2, outTemp=75.0))
+        SUT.add(self.packet(4, outTemp=72.0, windSpeed=None))
+
+        self.assertEqual(SUT.conditions(),
+                         {'dateTime': self.noon + 4, 'usUnits': 1,
+                          'current': {'outTemp': 72.0, 'windSpeed': None},
+                          'high': {'outTemp': [75.0, self.noon + 2], 'windSpeed': [5.0, self.noon]},
+                          'low': {'outTemp': [70.0, self.noon], 'windSpeed': [5.0, self.noon]}})
+
+    def test_fields(self):
+        SUT = ConditionsCache()
+        SUT.add(self.packet(0, outTemp=70.0, windSpeed=5.0, interval=5))
+
+        self.assertEqual(SUT.conditions(['outTemp']),
+                         {'dateTime': self.noon, 'usUnits': 1,
+                          'current': {'outTemp': 70.0},
+                          'high': {'outTemp': [70.0, self.noon]},
+                          'low': {'outTemp': [70.0, self.noon]}})
+
+    def test_starts_over_at_midnight(self):
+        SUT = ConditionsCache()
+        SUT.add(self.packet(0, outTemp=90.0))
+
+        SUT.add(self.packet(86400, outTemp=60.0))
+
+        self.assertEqual(SUT.conditions()['high'], {'outTemp': [60.0, self.noon + 86400]})
+
+    def test_starts_over_on_unit_system_change(self):
+        SUT = ConditionsCache()
+        SUT.add(self.packet(0, outTemp=90.0))
+
+        SUT.add(self.packet(2, usUnits=16, outTemp=20.0))
+
+        self.assertEqual(SUT.conditions()['high'], {'outTemp': [20.0, self.noon + 2]})
+
+    def test_rain_totals_in_memory(self):
+        aggregator = mock.Mock()
+        aggregator.augment.return_value = {'dayRain': 0.25}
+        SUT = ConditionsCache(aggregator=aggregator)
+        SUT.add(self.packet(0, rain=0.01))
+
+        self.assertEqual(SUT.conditions()['current'], {'rain': 0.01, 'dayRain': 0.25})
+
+    def test_augment_cache(self):
+        augment_cache = mock.Mock()
+        augment_cache.get.return_value = {'rain24': 0.5}
+        SUT = ConditionsCache(augment_cache=augment_cache)
+        SUT.add(self.packet(0, rain=0.0))
+
+        self.assertEqual(SUT.conditions()['current'], {'rain': 0.0, 'rain24': 0.5})
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,144 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import unittest
+import mock
+
+import weewx.manager
+import weewx.restx
+
+from user.mqttpublish import DailyAggregator, MQTTPublishThread, _sum
+
+SCHEMA = [('dateTime', 'INTEGER NOT NULL UNIQUE PRIMARY KEY'),
+          ('usUnits', 'INTEGER NOT NULL'),
+          ('interval', 'INTEGER NOT NULL'),
+          ('rain', 'REAL')]
+
+class TestAgainstArchive(unittest.TestCase):
+    def setUp(self):
+        # a day with a DST change, and the midnights either side of it
+        self.tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        self.addCleanup(self.restore_tz)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        database_dict = {'database_name': os.path.join(directory, 'archive.sdb'),
+                         'driver': 'weedb.sqlite'}
+        self.dbmanager = weewx.manager.Manager.open_with_create(database_dict, schema=SCHEMA)
+        self.addCleanup(self.dbmanager.close)
+        # what get_record is checked against
+        self.reference = weewx.restx.RESTThread(None, protocol_name='reference')
+        random.seed(0)
+
+    def restore_tz(self):
+        if self.tz is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = self.tz
+        time.tzset()
+
+    def add_record(self, time_ts):
+        rain = random.choice([None, 0.0, 0.0, 0.01, 0.02, random.uniform(0, 0.3)])
+        record = {'dateTime': time_ts, 'usUnits': 1, 'interval': 5, 'rain': rain}
+        self.dbmanager.addRecord(record, log_success=False)
+        return record
+
+    def assert_same(self, SUT, record):
+        expected = self.reference.get_record(dict(record), self.dbmanager)
+        totals = SUT.augment(record)
+        self.assertEqual(sorted(totals), ['dayRain', 'hourRain', 'rain24'])
+        for field in totals:
+            self.assertEqual(totals[field], expected[field], "%s at %s" % (field, record['dateTime']))
+
+    def test_same_as_get_record(self):
+        start = int(time.mktime((2024, 11, 2, 12, 0, 0, 0, 0, -1)))
+        for time_ts in range(start - 30 * 3600, start + 1, 300):
+            self.add_record(time_ts)
+        SUT = DailyAggregator()
+        SUT.seed(self.dbmanager, start)
+
+        for time_ts in range(start + 300, start + 40 * 3600, 300):
+            record = self.add_record(time_ts)
+            SUT.add(record)
+            self.assert_same(SUT, record)
+            # a loop packet between archive records
+            self.assert_same(SUT, {'dateTime': time_ts + 150, 'usUnits': 1})
+
+    def test_totals_in_record_kept(self):
+        now = int(time.time())
+        self.add_record(now)
+        SUT = DailyAggregator()
+        SUT.seed(self.dbmanager, now)
+
+        self.assertEqual(sorted(SUT.augment({'dateTime': now, 'usUnits': 1, 'dayRain': 1.0})),
+                         ['hourRain', 'rain24'])
+
+    def test_no_rain(self):
+        now = int(time.time())
+        SUT = DailyAggregator()
+        SUT.seed(self.dbmanager, now)
+
+        self.assertEqual(SUT.augment({'dateTime': now, 'usUnits': 1}),
+                         {'hourRain': None, 'rain24': None, 'dayRain': None})
+
+class TestDailyAggregator(unittest.TestCase):
+    def create_aggregator(self, now, rows):
+        dbmanager = mock.Mock()
+        dbmanager.connection.dbtype = 'sqlite'
+        dbmanager.genSql.return_value = rows
+        SUT = DailyAggregator()
+        SUT.seed(dbmanager, now)
+        return SUT
+
+    def test_not_seeded(self):
+        self.assertEqual(DailyAggregator().augment({'dateTime': 1, 'usUnits': 1}), {})
+
+    def test_before_seed_left_to_database(self):
+        now = 1700000000
+        SUT = self.create_aggregator(now, [])
+
+        self.assertEqual(SUT.augment({'dateTime': now - 25 * 3600, 'usUnits': 1}), {})
+
+    def test_mixed_units_left_to_database(self):
+        now = 1700000000
+        SUT = self.create_aggregator(now, [(now - 600, 0.1, 1), (now - 300, 0.1, 16)])
+
+        self.assertNotIn('hourRain', SUT.augment({'dateTime': now, 'usUnits': 1}))
+
+    def test_pruned_window_left_to_database(self):
+        now = 1700000000
+        SUT = self.create_aggregator(now, [])
+
+        SUT.add({'dateTime': now + 2 * 24 * 3600, 'usUnits': 1, 'rain': 0.1})
+
+        self.assertEqual(SUT.augment({'dateTime': now, 'usUnits': 1}), {})
+
+class TestSum(unittest.TestCase):
+    def test_plain(self):
+        self.assertEqual(_sum([1e16, 1.0, -1e16]), 0.0)
+
+    def test_compensated(self):
+        self.assertEqual(_sum([1e16, 1.0, -1e16], True), 1.0)
+
+class TestGetRecord(unittest.TestCase):
+    def test_totals_not_queried(self):
+        aggregator = mock.Mock()
+        aggregator.augment.return_value = {'hourRain': 0.1, 'rain24': 0.2, 'dayRain': 0.3}
+        dbmanager = mock.Mock()
+        SUT = MQTTPublishThread(None, None,
+                                server_url='mqtt://localhost:1883/',
+                                topics={},
+                                aggregator=aggregator)
+
+        record = SUT.get_record({'dateTime': 1, 'usUnits': 1}, dbmanager)
+
+        self.assertEqual(record, {'dateTime': 1, 'usUnits': 1, 'hourRain': 0.1, 'rain24': 0.2, 'dayRain': 0.3})
+        dbmanager.getSql.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,50 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import json
+import os
+import shutil
+import tempfile
+
+import unittest
+
+import paho.mqtt.client as mqtt
+
+from user.mqttpublish import FileTransport, TransportHealth, _get_transport
+
+class TestFileTransport(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'messages.jsonl')
+
+    def read(self):
+        with open(self.path) as messages_file:
+            return [json.loads(line) for line in messages_file]
+
+    def test_publish(self):
+        SUT = FileTransport('file://' + self.path).connect()
+        results = []
+
+        self.assertEqual(SUT.publish('weather', '{"outTemp": "20.0"}', qos=1, retain=True,
+                                     on_done=results.append),
+                         (mqtt.MQTT_ERR_SUCCESS, None))
+        SUT.publish('weather/outTemp', 20.0)
+        SUT.disconnect()
+
+        self.assertEqual(results, [mqtt.MQTT_ERR_SUCCESS])
+        self.assertEqual(self.read(), [{'topic': 'weather', 'payload': '{"outTemp": "20.0"}', 'qos': 1, 'retain': True},
+                                       {'topic': 'weather/outTemp', 'payload': 20.0, 'qos': 0, 'retain': False}])
+
+    def test_health(self):
+        SUT = FileTransport('file://' + self.path)
+        self.assertEqual(SUT.health(), TransportHealth(False, 0, 0))
+
+        SUT.connect()
+        self.addCleanup(SUT.disconnect)
+
+        self.assertEqual(SUT.health(), TransportHealth(True, 0, 0))
+
+    def test_by_name(self):
+        self.assertIs(_get_transport('file'), FileTransport)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,59 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import unittest
+
+from user.mqttpublish import HistoryBuffer
+
+class TestHistoryBuffer(unittest.TestCase):
+    def test_empty(self):
+        SUT = HistoryBuffer(3)
+
+        self.assertIsNone(SUT.last_time)
+        self.assertEqual(SUT.snapshot(), {'dateTime': []})
+
+    def test_snapshot(self):
+        SUT = HistoryBuffer(3)
+        SUT.append(1700000000, {'outTemp_F': '20.5', 'barometer_inHg': '30.1'})
+        SUT.append(1700000300, {'outTemp_F': '21.0'})
+
+        self.assertEqual(SUT.snapshot(), {'dateTime': [1700000000, 1700000300],
+                                          'outTemp_F': [20.5, 21.0],
+                                          'barometer_inHg': [30.1, None]})
+
+    def test_oldest_dropped(self):
+        SUT = HistoryBuffer(3)
+        for i in range(5):
+            SUT.append(1700000000 + i * 300, {'outTemp_F': 20.0 + i})
+
+        self.assertEqual(SUT.snapshot(), {'dateTime': [1700000600, 1700000900, 1700001200],
+                                          'outTemp_F': [22.0, 23.0, 24.0]})
+        self.assertEqual(SUT.last(), {'dateTime': 1700001200, 'outTemp_F': 24.0})
+
+    def test_field_seen_later(self):
+        SUT = HistoryBuffer(3)
+        SUT.append(1700000000, {'outTemp_F': 20.0})
+        SUT.append(1700000300, {'outTemp_F': 21.0, 'windSpeed_mph': 5.0})
+
+        self.assertEqual(SUT.snapshot()['windSpeed_mph'], [None, 5.0])
+
+    def test_not_newer(self):
+        SUT = HistoryBuffer(3)
+        SUT.append(1700000300, {'outTemp_F': 20.0})
+
+        self.assertFalse(SUT.append(1700000300, {'outTemp_F': 99.0}))
+        self.assertFalse(SUT.append(1700000000, {'outTemp_F': 99.0}))
+        self.assertEqual(SUT.snapshot(), {'dateTime': [1700000300], 'outTemp_F': [20.0]})
+
+    def test_not_reallocated(self):
+        SUT = HistoryBuffer(288)
+        SUT.append(1700000000, {'outTemp_F': 20.0})
+        column = SUT.columns['outTemp_F']
+
+        for i in range(1, 1000):
+            SUT.append(1700000000 + i * 300, {'outTemp_F': 20.0})
+
+        self.assertIs(SUT.columns['outTemp_F'], column)
+        self.assertEqual(len(column), 288)
+        self.assertEqual(column.itemsize * len(column), 2304)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
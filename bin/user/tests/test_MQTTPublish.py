@@ -9,8 +9,8 @@ import mock
 import configobj
 
 #import weewx
-from weewx import NEW_ARCHIVE_RECORD, NEW_LOOP_PACKET
-from user.mqttpublish import MQTTPublish
+from weewx import NEW_ARCHIVE_RECORD, NEW_LOOP_PACKET, ViolatedPrecondition
+from user.mqttpublish import MQTTPublish, WakeupQueue, AsyncioQueue, CompactRecord, WindowAggregator
 
 def random_string():
     # pylint: disable=unused-variable
@@ -28,7 +28,13 @@ class TestInitialization(unittest.TestCase):
                      retain=False,
                      qos=0,
                      inputs={},
-                     templates={}):
+                     templates={},
+                     connection=None,
+                     topic_alias=True,
+                     message_expiry_interval=None,
+                     content_type=None,
+                     max_backlog=None,
+                     stale=None):
         return {
             'skip_upload': skip_upload,
             'binding': binding,
@@ -40,7 +46,13 @@ class TestInitialization(unittest.TestCase):
             'retain': retain,
             'qos': qos,
             'inputs': inputs,
-            'templates': templates
+            'templates': templates,
+            'connection': connection,
+            'topic_alias': topic_alias,
+            'message_expiry_interval': message_expiry_interval,
+            'content_type': content_type,
+            'max_backlog': max_backlog,
+            'stale': stale
         }
 
     def test_minimum_configuration(self):
@@ -1171,6 +1183,535 @@ class TestInitialization(unittest.TestCase):
 
                                 mock_MQTTThread.assert_called_once_with('MQTTPublish', SUT.archive_queue, **site_config_final)
 
+    def test_topicsconnection(self):
+        mock_StdEngine = mock.Mock()
+        server_url = random_string()
+        topic = random_string()
+
+        connection = random_string()
+
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': {
+                    'server_url': server_url,
+                    'topics': {
+                        topic: {
+                            'connection': connection
+                        }
+                    }
+                }
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        manager_dict = {
+            random_string(): random_string()
+        }
+
+        topics = {
+            topic: self.create_topic(connection=connection)
+        }
+
+        site_dict = copy.deepcopy(config_dict['StdRESTful']['MQTTPublish'])
+        site_config = configobj.ConfigObj(site_dict)
+
+        site_dict_final = {
+            'server_url' : server_url,
+            'topics': topics,
+            'manager_dict': manager_dict
+        }
+        site_config_final = configobj.ConfigObj(site_dict_final)
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager') as mock_manager:
+                with mock.patch('weewx.manager.open_manager'):
+                    with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                        with mock.patch('user.mqttpublish.loginf'):
+                            with mock.patch('user.mqttpublish.MQTTPublishThread') as mock_MQTTThread:
+                                mock_restx.get_site_dict.return_value = site_config
+                                mock_manager.get_manager_dict_from_config.return_value = manager_dict
+
+                                SUT = MQTTPublish(mock_StdEngine, config)
+
+                                mock_MQTTThread.assert_called_once_with('MQTTPublish', SUT.archive_queue, **site_config_final)
+
+    def test_brokers(self):
+        mock_StdEngine = mock.Mock()
+        server_url = random_string()
+        broker = random_string()
+
+        brokers = {
+            broker: {
+                'server_url': random_string(),
+                'max_backlog': str(random.randint(1, 100))
+            }
+        }
+
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': {
+                    'server_url': server_url,
+                    'brokers': brokers
+                }
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        manager_dict = {
+            random_string(): random_string()
+        }
+
+        topics = {
+            'weather/loop': self.create_topic(),
+            'weather': self.create_topic(payload_type='individual')
+            }
+
+        site_dict = copy.deepcopy(config_dict['StdRESTful']['MQTTPublish'])
+        site_config = configobj.ConfigObj(site_dict)
+
+        site_dict_final = {
+            'server_url' : server_url,
+            'topics': topics,
+            'brokers': brokers,
+            'manager_dict': manager_dict
+        }
+        site_config_final = configobj.ConfigObj(site_dict_final)
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager') as mock_manager:
+                with mock.patch('weewx.manager.open_manager'):
+                    with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                        with mock.patch('user.mqttpublish.loginf'):
+                            with mock.patch('user.mqttpublish.MQTTPublishThread') as mock_MQTTThread:
+                                mock_restx.get_site_dict.return_value = site_config
+                                mock_manager.get_manager_dict_from_config.return_value = manager_dict
+
+                                SUT = MQTTPublish(mock_StdEngine, config)
+
+                                mock_MQTTThread.assert_called_once_with('MQTTPublish', SUT.archive_queue, **site_config_final)
+
+    def test_retry_policy(self):
+        mock_StdEngine = mock.Mock()
+        server_url = random_string()
+        retry_policy = {
+            'MQTT_ERR_QUEUE_SIZE': 'drop',
+            'socket.timeout': 'reconnect'
+        }
+
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': {
+                    'server_url': server_url,
+                    'retry_policy': retry_policy
+                }
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        manager_dict = {
+            random_string(): random_string()
+        }
+
+        topics = {
+            'weather/loop': self.create_topic(),
+            'weather': self.create_topic(payload_type='individual')
+            }
+
+        site_dict = copy.deepcopy(config_dict['StdRESTful']['MQTTPublish'])
+        site_config = configobj.ConfigObj(site_dict)
+
+        site_dict_final = {
+            'server_url' : server_url,
+            'topics': topics,
+            'retry_policy': retry_policy,
+            'manager_dict': manager_dict
+        }
+        site_config_final = configobj.ConfigObj(site_dict_final)
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager') as mock_manager:
+                with mock.patch('weewx.manager.open_manager'):
+                    with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                        with mock.patch('user.mqttpublish.loginf'):
+                            with mock.patch('user.mqttpublish.MQTTPublishThread') as mock_MQTTThread:
+                                mock_restx.get_site_dict.return_value = site_config
+                                mock_manager.get_manager_dict_from_config.return_value = manager_dict
+
+                                SUT = MQTTPublish(mock_StdEngine, config)
+
+                                mock_MQTTThread.assert_called_once_with('MQTTPublish', SUT.archive_queue, **site_config_final)
+
+    def test_network_loop_selector(self):
+        mock_StdEngine = mock.Mock()
+        server_url = random_string()
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': {
+                    'server_url': server_url,
+                    'network_loop': 'selector'
+                }
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        manager_dict = {
+            random_string(): random_string()
+        }
+
+        topics = {
+            'weather/loop': self.create_topic(),
+            'weather': self.create_topic(payload_type='individual')
+            }
+
+        site_dict = copy.deepcopy(config_dict['StdRESTful']['MQTTPublish'])
+        site_config = configobj.ConfigObj(site_dict)
+
+        site_dict_final = {
+            'server_url' : server_url,
+            'topics': topics,
+            'network_loop': 'selector',
+            'manager_dict': manager_dict
+        }
+        site_config_final = configobj.ConfigObj(site_dict_final)
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager') as mock_manager:
+                with mock.patch('weewx.manager.open_manager'):
+                    with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                        with mock.patch('user.mqttpublish.loginf'):
+                            with mock.patch('user.mqttpublish.MQTTPublishThread') as mock_MQTTThread:
+                                mock_restx.get_site_dict.return_value = site_config
+                                mock_manager.get_manager_dict_from_config.return_value = manager_dict
+
+                                SUT = MQTTPublish(mock_StdEngine, config)
+
+                                self.assertIsInstance(SUT.archive_queue, WakeupQueue)
+                                mock_MQTTThread.assert_called_once_with('MQTTPublish', SUT.archive_queue, **site_config_final)
+
+    def test_engine_asyncio(self):
+        mock_StdEngine = mock.Mock()
+        server_url = random_string()
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': {
+                    'server_url': server_url,
+                    'engine': 'asyncio'
+                }
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        manager_dict = {
+            random_string(): random_string()
+        }
+
+        topics = {
+            'weather/loop': self.create_topic(),
+            'weather': self.create_topic(payload_type='individual')
+            }
+
+        site_dict = copy.deepcopy(config_dict['StdRESTful']['MQTTPublish'])
+        site_config = configobj.ConfigObj(site_dict)
+
+        site_dict_final = {
+            'server_url' : server_url,
+            'topics': topics,
+            'manager_dict': manager_dict
+        }
+        site_config_final = configobj.ConfigObj(site_dict_final)
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager') as mock_manager:
+                with mock.patch('weewx.manager.open_manager'):
+                    with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                        with mock.patch('user.mqttpublish.loginf'):
+                            with mock.patch('user.mqttpublish.MQTTPublishAsyncThread') as mock_MQTTThread:
+                                mock_restx.get_site_dict.return_value = site_config
+                                mock_manager.get_manager_dict_from_config.return_value = manager_dict
+
+                                SUT = MQTTPublish(mock_StdEngine, config)
+
+                                self.assertIsInstance(SUT.archive_queue, AsyncioQueue)
+                                mock_MQTTThread.assert_called_once_with('MQTTPublish', SUT.archive_queue, **site_config_final)
+
+    def test_engine_unknown(self):
+        config = configobj.ConfigObj({'StdRESTful': {'MQTTPublish': {'server_url': random_string(),
+                                                                     'engine': 'asyncoi'}}})
+        site_config = configobj.ConfigObj(copy.deepcopy(config['StdRESTful']['MQTTPublish']))
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager'):
+                with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                    with mock.patch('user.mqttpublish.loginf'):
+                        mock_restx.get_site_dict.return_value = site_config
+
+                        with self.assertRaises(ViolatedPrecondition):
+                            MQTTPublish(mock.Mock(), config)
+
+    def test_time_budget(self):
+        mock_StdEngine = mock.Mock()
+        server_url = random_string()
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': {
+                    'server_url': server_url,
+                    'single_thread': 'True',
+                    'persist_connection': 'True',
+                    'time_budget': '0.5'
+                }
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        manager_dict = {
+            random_string(): random_string()
+        }
+
+        topics = {
+            'weather/loop': self.create_topic(),
+            'weather': self.create_topic(payload_type='individual')
+            }
+
+        site_dict = copy.deepcopy(config_dict['StdRESTful']['MQTTPublish'])
+        site_config = configobj.ConfigObj(site_dict)
+
+        site_dict_final = {
+            'server_url' : server_url,
+            'persist_connection': 'True',
+            'network_loop': 'selector',
+            'topics': topics,
+            'manager_dict': manager_dict
+        }
+        site_config_final = configobj.ConfigObj(site_dict_final)
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager') as mock_manager:
+                with mock.patch('weewx.manager.open_manager'):
+                    with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                        with mock.patch('user.mqttpublish.loginf'):
+                            with mock.patch('user.mqttpublish.MQTTPublishThread') as mock_MQTTThread:
+                                mock_restx.get_site_dict.return_value = site_config
+                                mock_manager.get_manager_dict_from_config.return_value = manager_dict
+
+                                SUT = MQTTPublish(mock_StdEngine, config)
+                                event = mock.Mock()
+                                SUT.new_loop_packet_single_thread(event)
+
+                                mock_MQTTThread.assert_called_once_with('MQTTPublish', None, **site_config_final)
+                                mock_MQTTThread.return_value.publish_within.assert_called_once_with(event.packet, SUT.dbmanager, 0.5)
+                                mock_MQTTThread.return_value.process_record.assert_not_called()
+
+    def test_time_budget_requires_persist_connection(self):
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': {
+                    'server_url': random_string(),
+                    'single_thread': 'True',
+                    'time_budget': '0.5'
+                }
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+        site_config = configobj.ConfigObj(copy.deepcopy(config_dict['StdRESTful']['MQTTPublish']))
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager'):
+                with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                    with mock.patch('user.mqttpublish.MQTTPublishThread'):
+                        mock_restx.get_site_dict.return_value = site_config
+
+                        with self.assertRaises(ViolatedPrecondition):
+                            MQTTPublish(mock.Mock(), config)
+
+class TestAugmentFrom(unittest.TestCase):
+    def create_service(self, augment_from, **options):
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': dict(options,
+                                    server_url=random_string(),
+                                    augment_from=augment_from,
+                                    topics={'weather': {'binding': 'archive'}})
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+        site_config = configobj.ConfigObj(copy.deepcopy(config_dict['StdRESTful']['MQTTPublish']))
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager'):
+                with mock.patch('user.mqttpublish.MQTTPublish.bind') as mock_bind:
+                    with mock.patch('user.mqttpublish.loginf'):
+                        with mock.patch('user.mqttpublish.MQTTPublishThread') as mock_MQTTThread:
+                            with mock.patch('user.mqttpublish.DailyAggregator') as mock_aggregator:
+                                mock_restx.get_site_dict.return_value = site_config
+                                SUT = MQTTPublish(mock.Mock(), config)
+        return SUT, mock_bind, mock_MQTTThread, mock_aggregator
+
+    def test_memory(self):
+        (SUT, mock_bind, mock_MQTTThread, mock_aggregator) = self.create_service('memory')
+
+        mock_aggregator.return_value.seed.assert_called_once()
+        self.assertIs(mock_MQTTThread.call_args.kwargs['aggregator'], SUT.aggregator)
+        # the totals are updated before the record is published
+        self.assertEqual(mock_bind.call_args_list[0].args, (NEW_ARCHIVE_RECORD, SUT.aggregate_archive_record))
+        self.assertEqual(mock_bind.call_args_list[1].args, (NEW_ARCHIVE_RECORD, SUT.new_archive_record))
+
+    def test_database(self):
+        (SUT, _, mock_MQTTThread, mock_aggregator) = self.create_service('database')
+
+        self.assertIsNone(SUT.aggregator)
+        mock_aggregator.assert_not_called()
+        self.assertNotIn('aggregator', mock_MQTTThread.call_args.kwargs)
+
+    def test_unknown(self):
+        with self.assertRaises(ViolatedPrecondition):
+            self.create_service('cache')
+
+    def test_augment_cache(self):
+        (SUT, mock_bind, mock_MQTTThread, _) = self.create_service('database', augment_cache_ttl='60')
+
+        self.assertEqual(SUT.augment_cache.ttl, 60)
+        self.assertIs(mock_MQTTThread.call_args.kwargs['augment_cache'], SUT.augment_cache)
+        self.assertIn(mock.call(NEW_ARCHIVE_RECORD, SUT.invalidate_augment_cache), mock_bind.call_args_list)
+
+        event = mock.Mock()
+        event.record = {'dateTime': 1}
+        SUT.invalidate_augment_cache(event)
+        self.assertEqual(SUT.augment_cache.archive_time, 1)
+
+    def test_request_topic(self):
+        (SUT, mock_bind, mock_MQTTThread, _) = self.create_service('memory', request_topic='weather/request')
+
+        self.assertIs(SUT.conditions.aggregator, SUT.aggregator)
+        self.assertIs(mock_MQTTThread.call_args.kwargs['conditions'], SUT.conditions)
+        self.assertIn(mock.call(NEW_LOOP_PACKET, SUT.add_loop_conditions), mock_bind.call_args_list)
+        self.assertIn(mock.call(NEW_ARCHIVE_RECORD, SUT.add_archive_conditions), mock_bind.call_args_list)
+
+        event = mock.Mock()
+        event.packet = {'dateTime': 1700000000, 'usUnits': 1, 'outTemp': 70.0}
+        SUT.add_loop_conditions(event)
+        self.assertEqual(SUT.conditions.conditions(['outTemp'])['current'], {'outTemp': 70.0})
+
+class TestFilterRecord(unittest.TestCase):
+    create_topic = TestInitialization.create_topic
+
+    def create_service(self, topics, **options):
+        config_dict = {
+            'StdRESTful': {
+                'MQTTPublish': dict(options, server_url=random_string(), topics=topics)
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+        site_config = configobj.ConfigObj(copy.deepcopy(config_dict['StdRESTful']['MQTTPublish']))
+
+        with mock.patch('weewx.restx') as mock_restx:
+            with mock.patch('weewx.manager'):
+                with mock.patch('user.mqttpublish.MQTTPublish.bind'):
+                    with mock.patch('user.mqttpublish.loginf'):
+                        with mock.patch('user.mqttpublish.MQTTPublishThread'):
+                            mock_restx.get_site_dict.return_value = site_config
+                            return MQTTPublish(mock.Mock(), config)
+
+    def test_fields_of_inputs(self):
+        topics = {
+            'weather/a': self.create_topic(upload_all=False, augment_record=False, inputs={'outTemp': {}}),
+            'weather/b': self.create_topic(upload_all=False, augment_record=False, inputs={'barometer': {}}),
+        }
+
+        self.assertEqual(MQTTPublish._init_fields(topics),
+                         frozenset(['dateTime', 'usUnits', 'interval', 'outTemp', 'barometer']))
+
+    def test_augmented_fields_kept(self):
+        topics = {'weather': self.create_topic(upload_all=False, inputs={'outTemp': {}})}
+
+        self.assertIn('dayRain', MQTTPublish._init_fields(topics))
+
+    def test_all_fields(self):
+        topics = {
+            'weather/a': self.create_topic(upload_all=False, inputs={'outTemp': {}}),
+            'weather/b': self.create_topic(),
+        }
+
+        self.assertIsNone(MQTTPublish._init_fields(topics))
+
+    def test_queued_record_filtered(self):
+        SUT = self.create_service({'weather': {'binding': 'loop',
+                                               'obs_to_upload': 'none',
+                                               'augment_record': 'False',
+                                               'inputs': {'outTemp': {}}}})
+        event = mock.Mock()
+        event.packet = {'dateTime': 1, 'usUnits': 1, 'outTemp': 20.0, 'extraTemp1': 30.0}
+
+        SUT.new_loop_packet(event)
+
+        record = SUT.archive_queue.get(False)
+        self.assertIsInstance(record, CompactRecord)
+        self.assertEqual(dict(record), {'dateTime': 1, 'usUnits': 1, 'outTemp': 20.0})
+
+    def test_compact_records_off(self):
+        SUT = self.create_service({'weather': {'binding': 'loop'}}, compact_records='False')
+        event = mock.Mock()
+        event.packet = {'dateTime': 1, 'usUnits': 1, 'outTemp': 20.0}
+
+        SUT.new_loop_packet(event)
+
+        self.assertIs(SUT.archive_queue.get(False), event.packet)
+
+class TestWindowTopic(unittest.TestCase):
+    @staticmethod
+    def init_topic(**options):
+        site_dict = {'topics': {'weather/5min': dict(options, binding='loop')}}
+        topic_dict = {}
+        MQTTPublish._init_topic_dict('weather/5min', site_dict, topic_dict)
+        return topic_dict
+
+    def test_window(self):
+        topic_dict = self.init_topic(window='300', aggregates=['avg', 'max'])
+
+        self.assertIsInstance(topic_dict['window'], WindowAggregator)
+        self.assertEqual(topic_dict['window'].window, 300)
+        self.assertEqual(topic_dict['window'].aggregates, ['avg', 'max'])
+        self.assertIsNone(topic_dict['window'].fields)
+
+    def test_default_aggregates(self):
+        topic_dict = self.init_topic(window='300', obs_to_upload='none', inputs={'outTemp': {}})
+
+        self.assertEqual(topic_dict['window'].aggregates, ['avg', 'min', 'max', 'last'])
+        self.assertEqual(topic_dict['window'].fields, ['outTemp'])
+
+    def test_no_window(self):
+        self.assertNotIn('window', self.init_topic())
+
+    def test_unknown_aggregate(self):
+        with self.assertRaises(ViolatedPrecondition):
+            self.init_topic(window='300', aggregates='median')
+
+class TestHistoryTopic(unittest.TestCase):
+    @staticmethod
+    def init_topic(**options):
+        site_dict = {'topics': {'weather/history': dict(options, type='history')}}
+        topic_dict = {}
+        MQTTPublish._init_topic_dict('weather/history', site_dict, topic_dict)
+        return topic_dict
+
+    def test_history(self):
+        topic_dict = self.init_topic(obs_to_upload='none', inputs={'outTemp': {}}, history_length='576',
+                                     history_interval='3600', history_append='true')
+
+        self.assertEqual(topic_dict['history'].length, 576)
+        self.assertEqual(topic_dict['history_interval'], 3600)
+        self.assertTrue(topic_dict['history_append'])
+
+    def test_defaults(self):
+        topic_dict = self.init_topic(obs_to_upload='none', inputs={'outTemp': {}})
+
+        self.assertEqual(topic_dict['history'].length, 288)
+        self.assertEqual(topic_dict['history_interval'], 0)
+        self.assertFalse(topic_dict['history_append'])
+
+    def test_requires_inputs(self):
+        with self.assertRaises(ViolatedPrecondition):
+            self.init_topic()
+
 if __name__ == '__main__':
     test_suite = unittest.TestSuite()
     test_suite.addTest(TestInitialization('test_topicsunit_system'))
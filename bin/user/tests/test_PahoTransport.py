@@ -0,0 +1,158 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import threading
+
+import unittest
+import mock
+
+import paho.mqtt.client as mqtt
+
+import weewx
+
+from user.mqttpublish import PahoTransport, TransportHealth, _get_transport
+from user.mqttbroker import MQTTBroker
+
+class TestPublish(unittest.TestCase):
+    def setUp(self):
+        self.broker = MQTTBroker().start()
+        self.addCleanup(self.broker.stop)
+
+    def publish(self, SUT, qos):
+        done = threading.Event()
+        results = []
+        def on_done(rc):
+            results.append(rc)
+            done.set()
+
+        (rc, _) = SUT.publish('weather', 'payload', qos=qos, on_done=on_done)
+
+        self.assertEqual(rc, mqtt.MQTT_ERR_SUCCESS)
+        self.assertTrue(done.wait(10))
+        return results
+
+    def test_qos1_completed_by_puback(self):
+        SUT = PahoTransport(self.broker.url).connect()
+        self.addCleanup(SUT.disconnect)
+
+        self.assertEqual(self.publish(SUT, 1), [mqtt.MQTT_ERR_SUCCESS])
+        self.assertEqual([message.topic for message in self.broker.messages], ['weather'])
+
+    def test_qos2_completed_by_pubcomp(self):
+        SUT = PahoTransport(self.broker.url).connect()
+        self.addCleanup(SUT.disconnect)
+
+        self.assertEqual(self.publish(SUT, 2), [mqtt.MQTT_ERR_SUCCESS])
+        self.assertEqual(self.broker.messages[0].qos, 2)
+        self.assertEqual(SUT.health(), TransportHealth(True, 0, 0))
+
+    def test_disconnect_fails_outstanding(self):
+        self.broker.ack = False
+        SUT = PahoTransport(self.broker.url).connect()
+        results = []
+
+        SUT.publish('weather', 'payload', qos=1, on_done=results.append)
+        self.assertTrue(self.broker.wait_for(lambda b: len(b.messages) == 1))
+        self.assertEqual(SUT.health().in_flight, 1)
+        SUT.disconnect()
+
+        self.assertEqual(results, [mqtt.MQTT_ERR_CONN_LOST])
+
+    def test_not_connected(self):
+        SUT = PahoTransport(self.broker.url)
+
+        self.assertEqual(SUT.health(), TransportHealth(False, 0, 0))
+
+class TestSubscribe(unittest.TestCase):
+    def setUp(self):
+        self.broker = MQTTBroker().start()
+        self.addCleanup(self.broker.stop)
+
+    def subscribe(self, SUT):
+        messages = []
+        received = threading.Event()
+        def on_message(topic, payload, properties): # pylint: disable=unused-argument
+            messages.append((topic, payload))
+            received.set()
+        SUT.subscribe('weather/request', on_message)
+        return (messages, received)
+
+    def test_receives_messages(self):
+        SUT = PahoTransport(self.broker.url).connect()
+        self.addCleanup(SUT.disconnect)
+        (messages, received) = self.subscribe(SUT)
+        self.assertTrue(self.broker.wait_for(lambda b: len(b.subscriptions) == 1))
+
+        self.broker.send('weather/request', 'payload')
+
+        self.assertTrue(received.wait(10))
+        self.assertEqual(messages, [('weather/request', b'payload')])
+
+    def test_subscribes_on_connect(self):
+        SUT = PahoTransport(self.broker.url)
+        (messages, received) = self.subscribe(SUT)
+        SUT.connect()
+        self.addCleanup(SUT.disconnect)
+        self.assertTrue(self.broker.wait_for(lambda b: len(b.subscriptions) == 1))
+
+        self.broker.send('weather/request', 'payload')
+
+        self.assertTrue(received.wait(10))
+        self.assertEqual(messages, [('weather/request', b'payload')])
+
+class TestFlowControl(unittest.TestCase):
+    def setUp(self):
+        self.broker = MQTTBroker().start()
+        self.addCleanup(self.broker.stop)
+
+    def test_queue_full(self):
+        self.broker.ack = False
+        SUT = PahoTransport(self.broker.url, max_queued_messages=1).connect()
+        self.addCleanup(SUT.disconnect)
+
+        self.assertEqual(SUT.publish('weather', 'payload', qos=1)[0], mqtt.MQTT_ERR_SUCCESS)
+        self.assertEqual(SUT.publish('weather', 'payload', qos=1)[0], mqtt.MQTT_ERR_QUEUE_SIZE)
+        self.assertFalse(SUT.wait_writable(0.2))
+
+    def test_writable_after_acknowledgement(self):
+        self.broker.ack_delay = 0.2
+        SUT = PahoTransport(self.broker.url, max_queued_messages=1).connect()
+        self.addCleanup(SUT.disconnect)
+
+        SUT.publish('weather', 'payload', qos=1)
+
+        self.assertTrue(SUT.wait_writable(10))
+        self.assertEqual(SUT.publish('weather', 'payload', qos=1)[0], mqtt.MQTT_ERR_SUCCESS)
+
+    def test_writable_without_network_loop(self):
+        self.broker.ack_delay = 0.2
+        SUT = PahoTransport(self.broker.url, max_queued_messages=1).connect(network_loop=False)
+        self.addCleanup(SUT.disconnect)
+
+        SUT.publish('weather', 'payload', qos=1)
+
+        self.assertTrue(SUT.wait_writable(10))
+
+    def test_qos0_queue_full(self):
+        SUT = PahoTransport(self.broker.url, max_queued_messages=1)
+        SUT.client = mock.Mock()
+        SUT.client._out_packet = [mock.Mock()] # pylint: disable=protected-access
+        results = []
+
+        self.assertEqual(SUT.publish('weather', 'payload', on_done=results.append),
+                         (mqtt.MQTT_ERR_QUEUE_SIZE, None))
+        self.assertEqual(results, [mqtt.MQTT_ERR_QUEUE_SIZE])
+        SUT.client.publish.assert_not_called()
+
+class TestGetTransport(unittest.TestCase):
+    def test_by_name(self):
+        self.assertIs(_get_transport('paho'), PahoTransport)
+
+    def test_by_class_name(self):
+        self.assertIs(_get_transport('user.mqttpublish.PahoTransport'), PahoTransport)
+
+    def test_unknown(self):
+        with mock.patch('user.mqttpublish.get_object', side_effect=ImportError):
+            with self.assertRaises(weewx.ViolatedPrecondition):
+                _get_transport('unknown.Transport')
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,36 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import unittest
+import mock
+
+from user.mqttpublish import RateLimiter
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst(self):
+        with mock.patch('user.mqttpublish.time.time', return_value=1000.0):
+            SUT = RateLimiter(2, burst=3)
+
+            self.assertEqual([SUT.allow() for _ in range(4)], [True, True, True, False])
+
+    def test_refills_at_rate(self):
+        with mock.patch('user.mqttpublish.time.time') as mock_time:
+            mock_time.return_value = 1000.0
+            SUT = RateLimiter(2)
+            self.assertTrue(SUT.allow())
+            self.assertFalse(SUT.allow())
+
+            mock_time.return_value = 1000.25
+            self.assertFalse(SUT.allow())
+            mock_time.return_value = 1000.5
+            self.assertTrue(SUT.allow())
+
+    def test_not_more_than_burst(self):
+        with mock.patch('user.mqttpublish.time.time') as mock_time:
+            mock_time.return_value = 1000.0
+            SUT = RateLimiter(1, burst=2)
+
+            mock_time.return_value = 2000.0
+
+            self.assertEqual([SUT.allow() for _ in range(3)], [True, True, False])
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
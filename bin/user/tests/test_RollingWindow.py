@@ -0,0 +1,67 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import random
+
+import unittest
+
+from user.mqttpublish import RollingWindow
+
+class TestRollingWindow(unittest.TestCase):
+    def test_empty(self):
+        SUT = RollingWindow(300)
+
+        self.assertIsNone(SUT.aggregate('avg'))
+        self.assertIsNone(SUT.aggregate('min'))
+
+    def test_aggregates(self):
+        SUT = RollingWindow(300)
+        for (time_ts, value) in ((2, 5.0), (4, 1.0), (6, 9.0), (8, 3.0)):
+            SUT.add(time_ts, value)
+
+        self.assertEqual(SUT.aggregate('avg'), 4.5)
+        self.assertEqual(SUT.aggregate('min'), 1.0)
+        self.assertEqual(SUT.aggregate('max'), 9.0)
+        self.assertEqual(SUT.aggregate('last'), 3.0)
+        self.assertEqual(SUT.aggregate('sum'), 18.0)
+        self.assertEqual(SUT.aggregate('count'), 4)
+
+    def test_expire(self):
+        SUT = RollingWindow(10)
+        SUT.add(0, 1.0)
+        SUT.add(5, 9.0)
+        SUT.add(10, 5.0)
+
+        SUT.expire(15)
+
+        # the window is (5, 15]
+        self.assertEqual(SUT.aggregate('count'), 1)
+        self.assertEqual(SUT.aggregate('min'), 5.0)
+        self.assertEqual(SUT.aggregate('max'), 5.0)
+
+    def test_same_as_recomputing(self):
+        random.seed(0)
+        SUT = RollingWindow(60)
+        values = []
+        for time_ts in range(0, 3000, 2):
+            value = round(random.uniform(-10, 10), 1)
+            SUT.add(time_ts, value)
+            values.append((time_ts, value))
+            SUT.expire(time_ts)
+            in_window = [v for (t, v) in values if t > time_ts - 60]
+
+            self.assertEqual(SUT.aggregate('min'), min(in_window))
+            self.assertEqual(SUT.aggregate('max'), max(in_window))
+            self.assertAlmostEqual(SUT.aggregate('avg'), sum(in_window) / len(in_window))
+        # only the values that can still be the minimum or the maximum are kept
+        self.assertLessEqual(len(SUT.mins), len(SUT.values))
+
+    def test_total_starts_over(self):
+        SUT = RollingWindow(10)
+        SUT.add(0, 0.1)
+        SUT.add(1, 0.2)
+
+        SUT.expire(20)
+
+        self.assertEqual(SUT.total, 0.0)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
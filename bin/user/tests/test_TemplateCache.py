@@ -0,0 +1,33 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import unittest
+
+from user.mqttpublish import TemplateCache
+
+class TestTemplateCache(unittest.TestCase):
+    def test_bounded(self):
+        SUT = TemplateCache(2)
+
+        for field in ['a', 'b', 'c']:
+            SUT[field] = {}
+
+        self.assertEqual(list(SUT), ['b', 'c'])
+
+    def test_least_recently_used_dropped(self):
+        SUT = TemplateCache(2)
+        SUT['a'] = {'format': '%.1f'}
+        SUT['b'] = {}
+
+        SUT.touch('a')
+        SUT['c'] = {}
+
+        self.assertEqual(list(SUT), ['a', 'c'])
+        self.assertEqual(SUT['a'], {'format': '%.1f'})
+
+    def test_compares_as_dict(self):
+        SUT = TemplateCache()
+        SUT['a'] = {}
+
+        self.assertEqual(SUT, {'a': {}})
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
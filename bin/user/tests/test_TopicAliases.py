@@ -0,0 +1,63 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import random
+import string
+
+import unittest
+
+from paho.mqtt.properties import Properties
+from paho.mqtt.packettypes import PacketTypes
+
+from user.mqttpublish import TopicAliases
+
+def random_string():
+    # pylint: disable=unused-variable
+    return ''.join([random.choice(string.ascii_letters + string.digits) for n in range(32)])
+
+def connack_properties(maximum):
+    properties = Properties(PacketTypes.CONNACK)
+    properties.TopicAliasMaximum = maximum
+    return properties
+
+class TestTopicAliases(unittest.TestCase):
+    def test_no_aliases_before_connack(self):
+        topic = random_string()
+        SUT = TopicAliases()
+
+        self.assertEqual(SUT.get(topic), (topic, None))
+        self.assertEqual(SUT.get(topic), (topic, None))
+
+    def test_assigned_on_first_use(self):
+        topic = random_string()
+        SUT = TopicAliases()
+        SUT.on_connect(None, None, {}, 0, connack_properties(random.randint(1, 10)))
+
+        self.assertEqual(SUT.get(topic), (topic, 1))
+        self.assertEqual(SUT.get(topic), ('', 1))
+
+    def test_maximum(self):
+        maximum = random.randint(1, 5)
+        topics = [random_string() for _ in range(maximum + 1)]
+        SUT = TopicAliases()
+        SUT.on_connect(None, None, {}, 0, connack_properties(maximum))
+
+        for i, topic in enumerate(topics[:-1]):
+            self.assertEqual(SUT.get(topic), (topic, i + 1))
+        self.assertEqual(SUT.get(topics[-1]), (topics[-1], None))
+        self.assertEqual(SUT.get(topics[0]), ('', 1))
+
+    def test_reset_on_reconnect(self):
+        topic = random_string()
+        SUT = TopicAliases()
+        SUT.on_connect(None, None, {}, 0, connack_properties(10))
+        SUT.get(random_string())
+        SUT.get(topic)
+
+        SUT.on_disconnect(None, None, 0)
+        self.assertEqual(SUT.get(topic), (topic, None))
+
+        SUT.on_connect(None, None, {}, 0, connack_properties(10))
+        self.assertEqual(SUT.get(topic), (topic, 1))
+        self.assertEqual(SUT.get(topic), ('', 1))
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,99 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import threading
+import time
+
+import unittest
+
+import weewx
+import weewx.restx
+
+from user.mqttpublish import TopicLane
+
+class TestTopicLane(unittest.TestCase):
+    def create_lane(self, publish, **kwargs):
+        SUT = TopicLane('weather/loop', publish, **kwargs)
+        self.addCleanup(SUT.shutdown)
+        return SUT
+
+    def test_published_in_order(self):
+        published = []
+        done = threading.Event()
+        def publish(topic, record):
+            published.append((topic, record['dateTime']))
+            if len(published) == 3:
+                done.set()
+        SUT = self.create_lane(publish)
+        SUT.start()
+
+        for i in range(3):
+            SUT.put({'dateTime': time.time() + i})
+
+        self.assertTrue(done.wait(10))
+        self.assertEqual([topic for (topic, _) in published], ['weather/loop'] * 3)
+        self.assertEqual([timestamp for (_, timestamp) in published],
+                         sorted(timestamp for (_, timestamp) in published))
+
+    def test_oldest_dropped(self):
+        published = []
+        done = threading.Event()
+        def publish(_topic, record):
+            published.append(record['dateTime'])
+            if record['dateTime'] == 4:
+                done.set()
+        SUT = self.create_lane(publish, max_backlog=2)
+
+        # queued before the lane runs, as when the broker is slow
+        for i in range(5):
+            SUT.put({'dateTime': i})
+        SUT.start()
+
+        self.assertTrue(done.wait(10))
+        self.assertEqual(published, [3, 4])
+        self.assertEqual(SUT.dropped, 3)
+
+    def test_stale_not_published(self):
+        published = []
+        done = threading.Event()
+        def publish(_topic, record):
+            published.append(record['dateTime'])
+            done.set()
+        SUT = self.create_lane(publish, stale=60)
+        SUT.start()
+
+        now = time.time()
+        SUT.put({'dateTime': now - 120})
+        SUT.put({'dateTime': now})
+
+        self.assertTrue(done.wait(10))
+        self.assertEqual(published, [now])
+        self.assertEqual(SUT.dropped, 1)
+
+    def test_failure_does_not_stop_lane(self):
+        published = []
+        done = threading.Event()
+        def publish(_topic, record):
+            if record['dateTime'] == 1:
+                raise weewx.restx.FailedPost("denied")
+            if record['dateTime'] == 2:
+                raise ValueError("bad record")
+            published.append(record['dateTime'])
+            done.set()
+        SUT = self.create_lane(publish)
+        SUT.start()
+
+        for i in range(1, 4):
+            SUT.put({'dateTime': i})
+
+        self.assertTrue(done.wait(10))
+        self.assertEqual(published, [3])
+
+    def test_shutdown(self):
+        SUT = TopicLane('weather/loop', lambda topic, record: None)
+        SUT.start()
+
+        SUT.shutdown()
+
+        self.assertFalse(SUT.is_alive())
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
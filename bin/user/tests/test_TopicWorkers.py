@@ -0,0 +1,75 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import threading
+import time
+
+import unittest
+
+from user.mqttpublish import TopicWorkers
+
+class TestTopicWorkers(unittest.TestCase):
+    def create_workers(self, topics, count):
+        SUT = TopicWorkers('test', topics, count)
+        self.addCleanup(SUT.shutdown)
+        return SUT
+
+    def test_results(self):
+        SUT = self.create_workers(['a', 'b', 'c'], 2)
+
+        results = SUT.run([(topic, lambda value: value * 2, (topic,)) for topic in ['a', 'b', 'c']])
+
+        self.assertEqual(results, {'a': 'aa', 'b': 'bb', 'c': 'cc'})
+
+    def test_exceptions(self):
+        SUT = self.create_workers(['a', 'b'], 2)
+        exception = ValueError('b failed')
+        def fail():
+            raise exception
+
+        results = SUT.run([('a', lambda: None, ()), ('b', fail, ())])
+
+        self.assertEqual(results, {'a': None, 'b': exception})
+
+    def test_topic_on_one_thread(self):
+        SUT = self.create_workers(['a', 'b', 'c'], 2)
+        threads = {}
+        def record_thread(topic):
+            threads.setdefault(topic, set()).add(threading.current_thread().name)
+
+        for _ in range(5):
+            SUT.run([(topic, record_thread, (topic,)) for topic in ['a', 'b', 'c']])
+
+        self.assertEqual([len(threads[topic]) for topic in ['a', 'b', 'c']], [1, 1, 1])
+        self.assertEqual(len(set.union(*threads.values())), 2)
+
+    def test_run_after_shutdown(self):
+        SUT = TopicWorkers('test', ['a', 'b'], 2)
+        SUT.shutdown()
+
+        results = SUT.run([(topic, threading.current_thread, ()) for topic in ['a', 'b']])
+
+        self.assertEqual(results, {'a': threading.current_thread(), 'b': threading.current_thread()})
+
+    def test_in_parallel(self):
+        SUT = self.create_workers(['a', 'b'], 2)
+        barrier = threading.Event()
+        def wait():
+            return barrier.wait(5)
+        def release():
+            barrier.set()
+
+        # 'a' only finishes once 'b' has run
+        start = time.time()
+        results = SUT.run([('a', wait, ()), ('b', release, ())])
+
+        self.assertTrue(results['a'])
+        self.assertLess(time.time() - start, 5)
+
+    def test_shutdown(self):
+        SUT = TopicWorkers('test', ['a'], 1)
+
+        SUT.shutdown()
+
+        self.assertFalse(SUT.threads[0].is_alive())
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,50 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import os
+import shutil
+import tempfile
+
+import unittest
+
+from user.mqttpublish import Watermark
+
+class TestWatermark(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'mqtt.watermark')
+
+    def test_no_file(self):
+        SUT = Watermark(self.path)
+
+        self.assertIsNone(SUT.time)
+
+    def test_saved(self):
+        Watermark(self.path).advance(1700000300)
+
+        self.assertEqual(Watermark(self.path).time, 1700000300)
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_never_goes_back(self):
+        SUT = Watermark(self.path)
+        SUT.advance(1700000300)
+
+        SUT.advance(1700000000)
+
+        self.assertEqual(Watermark(self.path).time, 1700000300)
+
+    def test_invalid(self):
+        with open(self.path, 'w') as watermark_file:
+            watermark_file.write('garbage')
+
+        self.assertIsNone(Watermark(self.path).time)
+
+    def test_interrupted_write(self):
+        Watermark(self.path).advance(1700000300)
+        # a crash while writing leaves the temporary file behind
+        with open(self.path + '.tmp', 'w') as watermark_file:
+            watermark_file.write('17000')
+
+        self.assertEqual(Watermark(self.path).time, 1700000300)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,81 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import unittest
+
+from user.mqttpublish import WindowAggregator
+
+class TestWindowAggregator(unittest.TestCase):
+    @staticmethod
+    def packet(time_ts, outTemp, usUnits=1, **fields):
+        record = {'dateTime': time_ts, 'usUnits': usUnits, 'outTemp': outTemp}
+        record.update(fields)
+        return record
+
+    def test_summary_once_a_window(self):
+        SUT = WindowAggregator(300, ['avg', 'min', 'max', 'last'])
+
+        self.assertIsNone(SUT.add(self.packet(1700000102, 10.0)))
+        self.assertIsNone(SUT.add(self.packet(1700000200, 20.0)))
+        # the window ends at 1700000100 + 300, a packet at the end is in it
+        self.assertIsNone(SUT.add(self.packet(1700000400, 15.0)))
+        summary = SUT.add(self.packet(1700000402, 99.0))
+
+        self.assertEqual(summary, {'avg': {'dateTime': 1700000400, 'usUnits': 1, 'outTemp': 15.0},
+                                   'min': {'dateTime': 1700000400, 'usUnits': 1, 'outTemp': 10.0},
+                                   'max': {'dateTime': 1700000400, 'usUnits': 1, 'outTemp': 20.0},
+                                   'last': {'dateTime': 1700000400, 'usUnits': 1, 'outTemp': 15.0}})
+
+    def test_next_window(self):
+        SUT = WindowAggregator(300, ['avg', 'count'])
+        SUT.add(self.packet(1700000102, 10.0))
+        SUT.add(self.packet(1700000402, 30.0))
+        SUT.add(self.packet(1700000502, 50.0))
+
+        summary = SUT.add(self.packet(1700000702, 0.0))
+
+        self.assertEqual(summary['avg'], {'dateTime': 1700000700, 'usUnits': 1, 'outTemp': 40.0})
+        self.assertEqual(summary['count']['outTemp'], 2)
+
+    def test_after_a_gap(self):
+        SUT = WindowAggregator(300, ['last'])
+        SUT.add(self.packet(1700000102, 10.0))
+
+        summary = SUT.add(self.packet(1700009002, 20.0))
+
+        self.assertEqual(summary, {'last': {'dateTime': 1700000400, 'usUnits': 1, 'outTemp': 10.0}})
+        self.assertEqual(SUT.end, 1700009100)
+
+    def test_published_again(self):
+        SUT = WindowAggregator(300, ['avg'])
+        SUT.add(self.packet(1700000102, 10.0))
+        summary = SUT.add(self.packet(1700000402, 30.0))
+
+        self.assertEqual(SUT.add(self.packet(1700000402, 30.0)), summary)
+        self.assertIsNone(SUT.add(self.packet(1700000102, 10.0)))
+        # neither is added twice, the first expires with the next summary
+        self.assertEqual(SUT.windows['outTemp'].aggregate('count'), 2)
+
+    def test_fields(self):
+        SUT = WindowAggregator(300, ['max'], fields=['outTemp'])
+        SUT.add(self.packet(1700000102, 10.0, windSpeed=5.0, interval=5))
+
+        summary = SUT.add(self.packet(1700000402, 30.0))
+
+        self.assertEqual(summary, {'max': {'dateTime': 1700000400, 'usUnits': 1, 'outTemp': 10.0}})
+
+    def test_not_numbers(self):
+        SUT = WindowAggregator(300, ['max'])
+        SUT.add(self.packet(1700000102, None, station='home'))
+
+        self.assertIsNone(SUT.add(self.packet(1700000402, 30.0)))
+
+    def test_unit_system_changes(self):
+        SUT = WindowAggregator(300, ['avg'])
+        SUT.add(self.packet(1700000102, 50.0))
+        SUT.add(self.packet(1700000202, 10.0, usUnits=16))
+
+        summary = SUT.add(self.packet(1700000402, 30.0, usUnits=16))
+
+        self.assertEqual(summary, {'avg': {'dateTime': 1700000400, 'usUnits': 16, 'outTemp': 10.0}})
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
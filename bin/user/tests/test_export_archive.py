@@ -0,0 +1,134 @@
+# pylint: disable=missing-docstring, invalid-name, line-too-long
+import json
+import os
+import shutil
+import tempfile
+
+import unittest
+import mock
+
+import configobj
+
+import weewx
+import weewx.manager
+
+from user.mqttpublish import export_archive
+from user.mqttbroker import MQTTBroker
+
+class TestExportArchive(unittest.TestCase):
+    start = 1700000000
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.output = os.path.join(directory, 'messages.jsonl')
+        database_dict = {'database_name': os.path.join(directory, 'archive.sdb'),
+                         'driver': 'weedb.sqlite'}
+        self.dbmanager = weewx.manager.Manager.open_with_create(
+            database_dict,
+            schema=[('dateTime', 'INTEGER NOT NULL UNIQUE PRIMARY KEY'),
+                    ('usUnits', 'INTEGER NOT NULL'),
+                    ('interval', 'INTEGER NOT NULL'),
+                    ('outTemp', 'REAL')])
+        self.addCleanup(self.dbmanager.close)
+        for i in range(10):
+            self.dbmanager.addRecord({'dateTime': self.start + i * 300, 'usUnits': 1, 'interval': 5,
+                                      'outTemp': 20.0 + i},
+                                     log_success=False)
+
+    @staticmethod
+    def create_config(server_url='mqtt://localhost:1883/', **options):
+        site = {'server_url': server_url,
+                'unit_system': 'US',
+                'topics': {'weather/archive': {'binding': 'archive', 'augment_record': False},
+                           'weather/loop': {'binding': 'loop', 'augment_record': False}}}
+        site.update(options)
+        return configobj.ConfigObj({'StdRESTful': {'MQTTPublish': site}})
+
+    def read(self):
+        with open(self.output) as messages_file:
+            return [json.loads(line) for line in messages_file]
+
+    def test_dry_run(self):
+        count = export_archive(self.create_config(), self.dbmanager, self.start + 300, self.start + 900,
+                               output=self.output)
+
+        self.assertEqual(count, 3)
+        messages = self.read()
+        self.assertEqual([message['topic'] for message in messages], ['weather/archive'] * 3)
+        self.assertEqual([json.loads(message['payload'])['dateTime'] for message in messages],
+                         ['1700000300.0', '1700000600.0', '1700000900.0'])
+
+    def test_batches(self):
+        count = export_archive(self.create_config(), self.dbmanager, self.start, self.start + 3000,
+                               batch=3, output=self.output)
+
+        self.assertEqual(count, 10)
+        self.assertEqual(len(self.read()), 10)
+
+    def test_service_options(self):
+        config = self.create_config(engine='asyncio', max_in_flight='100', compact_records='true',
+                                    time_budget='0.5', augment_from='memory')
+
+        count = export_archive(config, self.dbmanager, self.start, self.start + 300, output=self.output)
+
+        self.assertEqual(count, 2)
+
+    def test_no_batch(self):
+        with self.assertRaises(weewx.ViolatedPrecondition):
+            export_archive(self.create_config(), self.dbmanager, self.start, self.start,
+                           batch=0, output=self.output)
+
+    def test_named_topic(self):
+        export_archive(self.create_config(), self.dbmanager, self.start, self.start,
+                       topics=['weather/loop'], output=self.output)
+
+        self.assertEqual([message['topic'] for message in self.read()], ['weather/loop'])
+
+    def test_history_topic(self):
+        config = self.create_config()
+        config['StdRESTful']['MQTTPublish']['topics']['weather/history'] = {
+            'binding': 'archive', 'augment_record': False, 'type': 'history',
+            'history_length': 2, 'obs_to_upload': 'none',
+            'inputs': {'outTemp': {'format': '%.1f'}}}
+
+        export_archive(config, self.dbmanager, self.start, self.start + 600,
+                       topics=['weather/history'], output=self.output)
+
+        messages = self.read()
+        self.assertEqual([message['topic'] for message in messages], ['weather/history'] * 3)
+        self.assertEqual(json.loads(messages[2]['payload']),
+                         {'dateTime': [self.start + 300, self.start + 600], 'outTemp_F': [21.0, 22.0]})
+        self.assertTrue(messages[2]['retain'])
+
+    def test_unknown_topic(self):
+        with self.assertRaises(weewx.ViolatedPrecondition):
+            export_archive(self.create_config(), self.dbmanager, self.start, self.start,
+                           topics=['weather/unknown'], output=self.output)
+
+    def test_rate(self):
+        clock = [1000.0]
+        def sleep(seconds):
+            clock[0] += seconds
+        with mock.patch('user.mqttpublish.time.time', side_effect=lambda: clock[0]):
+            with mock.patch('user.mqttpublish.time.sleep', side_effect=sleep):
+                export_archive(self.create_config(), self.dbmanager, self.start, self.start + 3000,
+                               rate=10, output=self.output)
+
+        self.assertEqual(len(self.read()), 10)
+        # the first record is published straight away
+        self.assertAlmostEqual(clock[0], 1000.9)
+
+    def test_publish(self):
+        broker = MQTTBroker().start()
+        self.addCleanup(broker.stop)
+        config_dict = self.create_config(broker.url)
+        config_dict['StdRESTful']['MQTTPublish']['topics']['weather/archive']['qos'] = 1
+
+        count = export_archive(config_dict, self.dbmanager, self.start, self.start + 3000)
+
+        self.assertEqual(count, 10)
+        self.assertEqual([message.topic for message in broker.messages], ['weather/archive'] * 10)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
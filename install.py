@@ -20,5 +20,5 @@ class MQTTInstaller(ExtensionInstaller):
                 'StdRESTful': {
                     'MQTTPublish': {
                         'server_url': 'INSERT_SERVER_URL_HERE'}}},
-            files=[('bin/user', ['bin/user/mqttpublish.py'])]
+            files=[('bin/user', ['bin/user/mqttpublish.py', 'bin/user/mqttbroker.py'])]
             )